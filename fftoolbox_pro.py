@@ -14,19 +14,28 @@ Requirements: Python 3.8+  ·  ffmpeg + ffprobe in PATH
 License: MIT  ·  https://github.com/oskar26/FFToolbox
 """
 
-import sys, os, re, json, time, shutil, tempfile, subprocess, traceback, threading
+import sys, os, re, json, time, shutil, tempfile, subprocess, threading
+import hashlib, bisect, atexit
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from datetime import timedelta
 from typing import Optional, List, Tuple, Dict, Any
-from urllib.request import urlopen, Request
-from urllib.error import URLError
-from copy import deepcopy
+from collections import deque
+
+try:
+    # C-backed parser if present — ffprobe JSON runs to hundreds of KB and
+    # orjson decodes it several times faster. Never required.
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # ── auto-install rich ────────────────────────────────────────────────────────
 def _ensure_rich():
-    try:
-        import rich
-    except ImportError:
+    # find_spec answers "is it installed?" without importing the package —
+    # the real import happens once, in the from-imports below.
+    import importlib.util
+    if importlib.util.find_spec("rich") is None:
         print("⚙  Installing 'rich' for beautiful UI …")
         try:
             subprocess.check_call([sys.executable, "-m", "pip", "install",
@@ -48,11 +57,9 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.rule import Rule
 from rich.progress import (Progress, BarColumn, TextColumn,
-                           TaskProgressColumn, SpinnerColumn, TimeElapsedColumn)
+                           TaskProgressColumn, SpinnerColumn)
 from rich.prompt import Prompt, Confirm
-from rich.columns import Columns
 from rich import box
-from rich.align import Align
 from rich.markup import escape
 from rich.text import Text
 
@@ -71,30 +78,43 @@ GITHUB_API_URL  = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/re
 GITHUB_RAW_BASE = f"https://raw.githubusercontent.com/{GITHUB_OWNER}/{GITHUB_REPO}/{GITHUB_BRANCH}"
 GITHUB_SCRIPT   = f"{GITHUB_RAW_BASE}/fftoolbox_pro.py"
 CONFIG_DIR      = Path.home() / ".config" / "fftoolbox"
+CACHE_DIR       = Path.home() / ".cache" / "fftoolbox"
+PROBE_CACHE_DIR = CACHE_DIR / "probe"
 PRESETS_DIR    = CONFIG_DIR / "presets"
 HISTORY_FILE   = CONFIG_DIR / "history.json"
 BITRATE_SAFETY = 0.94   # 94% — ensures output is always UNDER user's target
+VAAPI_DEVICE   = "/dev/dri/renderD128"
 
 WHATSAPP_MB    = 100
 TELEGRAM_MB    = 2048
 
-VIDEO_EXTENSIONS = {
+VIDEO_EXTENSIONS = frozenset({
     ".mp4",".mov",".mkv",".m4v",".avi",".wmv",".flv",".webm",
     ".mxf",".ts",".mts",".m2ts",".mpg",".mpeg",".3gp",".ogv",
     ".dv",".vob",".f4v",".rmvb",".asf",
-}
-AUDIO_EXTENSIONS = {
+})
+AUDIO_EXTENSIONS = frozenset({
     ".mp3",".aac",".flac",".wav",".ogg",".opus",".m4a",
     ".wma",".aiff",".aif",".ape",".mka",".ac3",".eac3",
-}
+})
 ALL_MEDIA = VIDEO_EXTENSIONS | AUDIO_EXTENSIONS
 
-PROFESSIONAL_CODECS = {
+def _media_ext(name: str) -> str:
+    """Lowercased extension of a bare filename. splitext builds a 2-tuple
+    per call; the scandir walkers run this once per directory entry, so a
+    single rfind + slice is worth having."""
+    i = name.rfind(".")
+    return name[i:].lower() if i > 0 else ""
+
+PROFESSIONAL_CODECS = frozenset({
     "prores","prores_ks","dnxhd","dnxhr","mjpeg","v210",
     "r10k","r210","cineform","cfhd","huffyuv","ffv1","utvideo",
-}
+})
+# Single C-level scan instead of 13 Python substring tests per codec name
+_PRO_CODEC_RE = re.compile(
+    "|".join(map(re.escape, sorted(PROFESSIONAL_CODECS, key=len, reverse=True))))
 
-RESOLUTIONS = [
+RESOLUTIONS = (
     (None,  None,  "Keep original"),
     (3840,  2160,  "4K UHD   (3840 × 2160)"),
     (2560,  1440,  "1440p    (2560 × 1440)"),
@@ -104,7 +124,40 @@ RESOLUTIONS = [
     (640,   360,   "360p     (640 × 360)"),
     (426,   240,   "240p     (426 × 240)"),
     (256,   144,   "144p     (256 × 144)"),
-]
+)
+_RES_CHOICES = [str(i) for i in range(len(RESOLUTIONS)+1)]   # 0..N incl. Custom
+
+# Substrings that mark a codec name as a hardware encoder — shared by every
+# place that branches on SW vs HW (was rebuilt as a set literal per call)
+HW_KEYS = frozenset({"nvenc","vaapi","qsv","videotoolbox","amf"})
+
+@lru_cache(maxsize=16)
+def _is_hw_codec(co: str) -> bool:
+    """Does this encoder name belong to a hardware vendor? Scanned several
+    times per build_cmd call, so memoize per codec string — a batch only
+    ever sees a handful of names."""
+    return any(h in co for h in HW_KEYS)
+
+# Codecs the NVDEC/QSV decode ASICs handle. Anything else (ProRes, DNxHD,
+# FFV1, MJPEG …) makes -hwaccel silently fall back to software decode, and
+# scale_cuda/scale_qsv then abort on the system-memory frames it produces.
+_HW_DECODE_OK = frozenset({"h264","hevc","mpeg1video","mpeg2video",
+                           "mpeg4","vc1","vp8","vp9","av1"})
+
+def _hw_decodable(codec_name: Optional[str], pix_fmt: str = "") -> bool:
+    """Can the source stream ride the full-GPU decode path? When this is
+    False the HW encoders are still fine — they just get fed by software
+    decode + software scale, which works from any source."""
+    if codec_name not in _HW_DECODE_OK:
+        return False
+    if codec_name == "h264" and "10" in pix_fmt:
+        return False   # the ASICs only decode 8-bit H.264
+    return True
+
+# One devnull fd for every silenced subprocess — subprocess.DEVNULL opens
+# and closes a fresh one per call
+_DEVNULL = os.open(os.devnull, os.O_RDWR)
+atexit.register(os.close, _DEVNULL)
 
 AUDIO_FORMATS = {
     "mp3":  {"codec":"libmp3lame", "ext":".mp3", "label":"MP3  — universal compatibility"},
@@ -119,6 +172,8 @@ AUDIO_FORMATS = {
 # VIDEO PRESETS
 # ════════════════════════════════════════════════════════════════════════
 
+# Preset values are scalars only (str/int/float/bool/None) — per-file
+# customization relies on cheap dict() copies, so keep it that way.
 PRESETS: Dict[str, Dict[str, Any]] = {
 
     # ── Smart ────────────────────────────────────────────────────────────
@@ -291,7 +346,7 @@ def load_history() -> Dict[str, Any]:
     try:
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         if HISTORY_FILE.exists():
-            return json.loads(HISTORY_FILE.read_text())
+            return _json_loads(HISTORY_FILE.read_bytes())
     except Exception:
         pass
     return {"recent_files": [], "recent_dirs": [], "last_output_dir": None}
@@ -319,36 +374,146 @@ def add_to_history(h: Dict[str, Any], files: List[str], output_dir: str) -> None
 # SYSTEM / FFPROBE HELPERS
 # ════════════════════════════════════════════════════════════════════════
 
+def _which_many(names: Tuple[str, ...]) -> Dict[str, Optional[str]]:
+    """Locate several executables in one walk over PATH (shutil.which
+    re-walks PATH per name)."""
+    found: Dict[str, Optional[str]] = {n: None for n in names}
+    missing = set(names)
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if not d or not missing:
+            continue
+        for n in tuple(missing):
+            p = os.path.join(d, n)
+            if os.path.isfile(p) and os.access(p, os.X_OK):
+                found[n] = p; missing.discard(n)
+    return found
+
+# Resolve the binaries once at import — every spawn then skips the PATH
+# scan, and check_deps stops re-walking PATH per call.
+_bins = _which_many(("ffmpeg", "ffprobe"))
+_FFMPEG_PATH  = _bins["ffmpeg"]
+_FFPROBE_PATH = _bins["ffprobe"]
+FFMPEG  = _FFMPEG_PATH  or "ffmpeg"
+FFPROBE = _FFPROBE_PATH or "ffprobe"
+
 def check_deps() -> Tuple[bool, bool]:
-    return bool(shutil.which("ffmpeg")), bool(shutil.which("ffprobe"))
+    return bool(_FFMPEG_PATH), bool(_FFPROBE_PATH)
 
-def run_ffprobe(path: str) -> Optional[dict]:
-    cmd = ["ffprobe","-v","error","-print_format","json",
-           "-show_format","-show_streams",path]
+def _probe_cache_file(path: str, size: int, mtime_ns: int) -> Path:
+    key = f"{path}|{size}|{mtime_ns}".encode()
+    return PROBE_CACHE_DIR / (hashlib.blake2b(key, digest_size=16).hexdigest() + ".json")
+
+@lru_cache(maxsize=128)
+def _ffprobe_cached(path: str, size: int, mtime_ns: int) -> Optional[dict]:
+    cache_file = _probe_cache_file(path, size, mtime_ns)
+    try:
+        if cache_file.exists():
+            return _json_loads(cache_file.read_bytes())
+    except Exception:
+        pass   # corrupt cache entry — re-probe
+    # Cap the demuxer scan: headers of well-formed containers carry every
+    # field we read, and the default 5 MB / 5 s probe mostly burns time
+    # confirming codecs on long files.  Failure mode is benign — a stream
+    # the capped probe misses shows up as "?" in the UI.
+    # Project down to the fields this module actually reads — full
+    # -show_format/-show_streams dumps every disposition flag, tag and
+    # side-data packet, which on a chaptered MKV is hundreds of KB of
+    # JSON nothing here looks at. Extend this list when adding a reader.
+    cmd = [FFPROBE,"-v","error","-probesize","1M","-analyzeduration","1M",
+           "-print_format","json=c=1","-show_entries",
+           "format=duration,size,bit_rate:"
+           "stream=codec_type,codec_name,pix_fmt,width,height,duration,"
+           "r_frame_rate,bit_rate,sample_rate,channels",path]
+    # stderr goes to the shared devnull fd: nothing reads it on the happy
+    # path, and a pipe per spawn is setup cost the thread-pool probes pay
+    # N times over. FFTOOLBOX_DEBUG keeps it capturable for diagnosis.
+    err_sink = subprocess.PIPE if os.environ.get("FFTOOLBOX_DEBUG") else _DEVNULL
     try:
-        r = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                           check=True, text=True, timeout=30)
-        return json.loads(r.stdout)
+        r = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=err_sink,
+                           check=True, timeout=30)
+        info = _json_loads(r.stdout)   # both parsers take bytes — skip the decode
     except subprocess.TimeoutExpired:
         console.print("[red]  ffprobe timed out[/]"); return None
-    except (json.JSONDecodeError, subprocess.CalledProcessError) as e:
+    except (ValueError, subprocess.CalledProcessError) as e:   # both parsers raise ValueError subclasses
         console.print(f"[red]  ffprobe error: {str(e)[:100]}[/]"); return None
+    try:
+        PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # write-then-rename so a concurrent probe (or a killed run) never
+        # leaves a truncated JSON entry behind for the next warm start
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(info))
+        os.replace(tmp, cache_file)
+    except Exception:
+        pass
+    return info
+
+def run_ffprobe(path: str) -> Optional[dict]:
+    """ffprobe with a (path, size, mtime)-keyed cache — in-memory for this
+    run, on disk under ~/.cache/fftoolbox/ for re-runs on the same files."""
+    try:
+        path = os.path.realpath(path)   # symlinks/hardlinks share one entry
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _ffprobe_cached(path, st.st_size, st.st_mtime_ns)
+
+def batch_probe(files: List[str], infos: Dict[str, Optional[dict]],
+                quiet: bool = False) -> None:
+    """Probe all not-yet-probed files concurrently, filling `infos` in place.
+    ffprobe runs out-of-process, so a thread pool flattens N serial probes
+    to roughly ceil(N/workers) probe latencies. `quiet` skips the spinner —
+    used when probing runs in the background behind an interactive prompt."""
+    pending = [f for f in files if infos.get(f) is None]
+    if len(pending) < 2:
+        for f in pending:
+            infos[f] = run_ffprobe(f)
+        return
+    # ffprobe decodes a little, so scale with the machine rather than a
+    # fixed magic number — 2× cores keeps the pipe full while one waits on I/O
+    workers = min(len(pending), max(4, 2 * (os.cpu_count() or 4)), 32)
+
+    def _drain():
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for f, fi in zip(pending, ex.map(run_ffprobe, pending)):
+                infos[f] = fi
+
+    if quiet:
+        _drain()
+    else:
+        with console.status(f"[cyan]Probing {len(pending)} file(s) …[/]"):
+            _drain()
+
+def _classify_streams(info: dict) -> Tuple[Optional[dict], List[dict], List[dict]]:
+    """One pass over info['streams'] → (video, audios, subtitles), cached on
+    the info dict so the per-file helpers stop re-walking the list."""
+    c = info.get("_classified")
+    if c is None:
+        video: Optional[dict] = None
+        audios: List[dict] = []
+        subs:   List[dict] = []
+        for s in info.get("streams",()):
+            t = s.get("codec_type")
+            if t == "video":
+                if video is None: video = s
+            elif t == "audio":
+                audios.append(s)
+            elif t == "subtitle":
+                subs.append(s)
+        c = info["_classified"] = (video, audios, subs)
+    return c
 
 def video_stream(info: dict) -> Optional[dict]:
-    for s in info.get("streams",[]):
-        if s.get("codec_type") == "video": return s
-    return None
+    return _classify_streams(info)[0]
 
 def audio_stream(info: dict) -> Optional[dict]:
-    for s in info.get("streams",[]):
-        if s.get("codec_type") == "audio": return s
-    return None
+    audios = _classify_streams(info)[1]
+    return audios[0] if audios else None
 
 def all_audio_streams(info: dict) -> List[dict]:
-    return [s for s in info.get("streams",[]) if s.get("codec_type") == "audio"]
+    return _classify_streams(info)[1]
 
 def subtitle_streams(info: dict) -> List[dict]:
-    return [s for s in info.get("streams",[]) if s.get("codec_type") == "subtitle"]
+    return _classify_streams(info)[2]
 
 def file_duration(info: dict) -> float:
     vs = video_stream(info)
@@ -365,10 +530,14 @@ def file_size_bytes(info: dict) -> int:
 def is_audio_only(info: dict) -> bool:
     return video_stream(info) is None and audio_stream(info) is not None
 
+def _is_pro_codec(name: str) -> bool:
+    """Exact frozenset hit first (the usual case — ffprobe reports plain
+    'prores'/'dnxhd'), regex scan only for suffixed variants."""
+    return name in PROFESSIONAL_CODECS or bool(_PRO_CODEC_RE.search(name))
+
 def is_professional(info: dict) -> bool:
     vs = video_stream(info)
-    vc = (vs or {}).get("codec_name","").lower()
-    return any(p in vc for p in PROFESSIONAL_CODECS)
+    return _is_pro_codec((vs or {}).get("codec_name","").lower())
 
 def safe_int(val, default=0) -> int:
     try: return int(val)
@@ -378,11 +547,12 @@ def safe_float(val, default=0.0) -> float:
     try: return float(val)
     except: return default
 
+_SIZE_UNITS = ("B","KB","MB","GB","TB","PB")
+
 def human_size(b: float) -> str:
-    for u in ["B","KB","MB","GB","TB"]:
-        if abs(b) < 1024.0: return f"{b:6.1f} {u}"
-        b /= 1024.0
-    return f"{b:.1f} PB"
+    # bit_length picks the unit in one step — no divide loop per call
+    i = min(len(_SIZE_UNITS)-1, max(0, (int(abs(b)).bit_length()-1)//10))
+    return f"{b/(1<<(i*10)):6.1f} {_SIZE_UNITS[i]}"
 
 def human_dur(secs: float) -> str:
     if secs <= 0: return "0:00:00"
@@ -395,33 +565,60 @@ def fps_str(vs: dict) -> str:
         return f"{int(n)/int(d):.3g} fps"
     except: return raw or "?"
 
-def scale_vf(src_w: int, src_h: int, max_res: Tuple[int,int]) -> Optional[str]:
+@lru_cache(maxsize=64)
+def fit_resolution(src_w: int, src_h: int,
+                   max_res: Tuple[int,int]) -> Optional[Tuple[int,int]]:
+    """Even-dimension (w, h) fitting src into max_res, or None if no
+    downscale is needed."""
     mw, mh = max_res
     if src_w <= mw and src_h <= mh: return None
-    ratio = min(mw/src_w, mh/src_h)
-    nw = (int(src_w*ratio)//2)*2
-    nh = (int(src_h*ratio)//2)*2
-    return f"scale={nw}:{nh}:flags=lanczos"
+    # Integer cross-multiply picks the binding edge without float ratios;
+    # & ~1 rounds down to even in one op. Cached — batches share dimensions.
+    if mw * src_h <= mh * src_w:
+        nw, nh = mw, (src_h * mw) // src_w
+    else:
+        nw, nh = (src_w * mh) // src_h, mh
+    return (nw & ~1, nh & ~1)
+
+@lru_cache(maxsize=32)
+def scale_vf(src_w: int, src_h: int, max_res: Tuple[int,int]) -> Optional[str]:
+    dims = fit_resolution(src_w, src_h, max_res)
+    if not dims: return None
+    return f"scale={dims[0]}:{dims[1]}:flags=lanczos"
+
+def source_video_kbps(info: dict) -> int:
+    """Actual video bitrate of the source in kb/s (0 if unknown)."""
+    vs = video_stream(info)
+    k  = safe_int((vs or {}).get("bit_rate")) // 1000
+    if k: return k
+    total = safe_int(info.get("format",{}).get("bit_rate")) // 1000
+    if not total: return 0
+    audio = sum(safe_int(a.get("bit_rate"))//1000 for a in all_audio_streams(info))
+    return max(0, total - audio)
 
 def target_video_kbps(target_mb: float, duration_s: float,
                       audio_kbps: int, safety: float = BITRATE_SAFETY) -> int:
     bits   = target_mb * 8 * 1024 * 1024 * safety
     return max(80, int(bits / max(duration_s, 1) / 1000 - audio_kbps))
 
-def parse_progress_time(line: str) -> Optional[float]:
-    m = re.search(r"time=(\d+):(\d+):([\d.]+)", line)
-    if m: return int(m.group(1))*3600 + int(m.group(2))*60 + float(m.group(3))
-    return None
+def already_under_target(preset: dict, info: dict) -> bool:
+    """True if the source video bitrate is already at/below the computed
+    target bitrate — re-encoding would burn a full encode for no size win."""
+    if not preset.get("target_mb"): return False
+    dur = file_duration(info)
+    if dur <= 0: return False
+    tgt = target_video_kbps(preset["target_mb"], dur, preset.get("audio_kbps") or 128)
+    src = source_video_kbps(info)
+    return bool(src) and tgt >= src * 0.95
 
 # ════════════════════════════════════════════════════════════════════════
 # HARDWARE ENCODER DETECTION + FALLBACK
 # ════════════════════════════════════════════════════════════════════════
 
-_HW_CACHE: Optional[List[Tuple[str,str]]] = None
-
+@lru_cache(maxsize=1)
 def detect_hw_encoders() -> List[Tuple[str,str]]:
-    global _HW_CACHE
-    if _HW_CACHE is not None: return _HW_CACHE
+    """Which HW encoders this ffmpeg build ships. One 'ffmpeg -encoders'
+    spawn per process — the encoder list can't change under us."""
     candidates = [
         ("h264_nvenc","NVIDIA NVENC H.264"),("hevc_nvenc","NVIDIA NVENC H.265"),
         ("h264_vaapi","VAAPI H.264 (Intel/AMD)"),("hevc_vaapi","VAAPI H.265 (Intel/AMD)"),
@@ -431,49 +628,90 @@ def detect_hw_encoders() -> List[Tuple[str,str]]:
         ("hevc_videotoolbox","Apple VideoToolbox H.265"),
     ]
     try:
-        r = subprocess.run(["ffmpeg","-hide_banner","-encoders"],
-                           stdout=subprocess.PIPE,stderr=subprocess.PIPE,text=True,timeout=5)
-        out = r.stdout
-        _HW_CACHE = [(e,l) for e,l in candidates if e in out]
-    except: _HW_CACHE = []
-    return _HW_CACHE
-
-def hw_fallback(codec: str, input_path: str) -> str:
-    """Test HW encoder; fallback to libx264/libx265 if it fails."""
-    HW = {"nvenc","vaapi","qsv","videotoolbox","amf"}
-    if not any(h in codec for h in HW): return codec
+        r = subprocess.run([FFMPEG,"-hide_banner","-encoders"],
+                           stdout=subprocess.PIPE,stderr=subprocess.PIPE,timeout=5)
+        out = r.stdout   # bytes — substring test needs no decode
+        return [(e,l) for e,l in candidates if e.encode() in out]
+    except Exception:
+        return []
+
+_HW_VERDICT: Dict[str, str] = {}        # codec → codec-that-actually-works
+HW_VERDICT_FILE = CACHE_DIR / "hw_verdict.json"
+
+@lru_cache(maxsize=1)
+def _ffmpeg_version() -> str:
+    try:
+        r = subprocess.run([FFMPEG,"-version"], stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE, timeout=5)
+        return r.stdout.split(b"\n", 1)[0].decode(errors="replace")
+    except Exception:
+        return "unknown"
+
+def _load_hw_verdicts() -> Dict[str, str]:
+    # Verdicts are only as durable as the ffmpeg build + driver behind
+    # them — key the cache by version line and drop it on mismatch.
+    # FFTOOLBOX_REPROBE_HW=1 forces a fresh probe regardless.
+    if os.environ.get("FFTOOLBOX_REPROBE_HW"):
+        return {}
+    try:
+        if HW_VERDICT_FILE.exists():
+            d = _json_loads(HW_VERDICT_FILE.read_bytes())
+            if d.pop("_ffmpeg", None) == _ffmpeg_version():
+                return d
+    except Exception:
+        pass
+    return {}
+
+def _save_hw_verdict(codec: str, result: str) -> None:
+    _HW_VERDICT[codec] = result
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        d = _load_hw_verdicts(); d[codec] = result
+        d["_ffmpeg"] = _ffmpeg_version()
+        HW_VERDICT_FILE.write_text(json.dumps(d, indent=2))
+    except Exception:
+        pass
+
+def hw_fallback(codec: str) -> str:
+    """Test HW encoder; fallback to libx264/libx265 if it fails.
+    The verdict is stable per machine, so it's cached in-process and on
+    disk — the probe encode runs once, not once per file. What fails is
+    encoder *initialization*, so one synthetic testsrc frame into -f null
+    answers it without touching the user's file or the disk."""
+    if not _is_hw_codec(codec): return codec
+    if not _HW_VERDICT:
+        _HW_VERDICT.update(_load_hw_verdicts())   # read the disk cache once
+    if codec in _HW_VERDICT: return _HW_VERDICT[codec]
     console.print(f"  [dim]Testing {codec} …[/]", end="")
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tf: tmp = tf.name
     try:
         r = subprocess.run(
-            ["ffmpeg","-hide_banner","-y","-i",input_path,"-t","1",
-             "-vf","scale=320:180","-c:v",codec,"-an",tmp],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+            [FFMPEG,"-hide_banner","-f","lavfi",
+             "-i","testsrc=size=320x180:rate=1:duration=1",
+             "-frames:v","1","-c:v",codec,"-an","-f","null","-"],
+            stdout=_DEVNULL, stderr=_DEVNULL, timeout=10)
         if r.returncode == 0:
-            console.print(" [green]OK[/]"); return codec
+            console.print(" [green]OK[/]")
+            _save_hw_verdict(codec, codec); return codec
         raise RuntimeError()
     except Exception:
         fb = "libx265" if "hevc" in codec else "libx264"
-        console.print(f" [yellow]failed → {fb}[/]"); return fb
-    finally:
-        try: os.unlink(tmp)
-        except: pass
+        console.print(f" [yellow]failed → {fb}[/]")
+        _save_hw_verdict(codec, fb); return fb
 
 # ════════════════════════════════════════════════════════════════════════
 # SMART PRESET ANALYSIS
 # ════════════════════════════════════════════════════════════════════════
 
-def compute_smart_preset(info: dict) -> dict:
-    preset = deepcopy(PRESETS["smart"])
-    vs     = video_stream(info)
-    dur    = file_duration(info)
-    sz     = file_size_bytes(info)
-    src_w  = safe_int((vs or {}).get("width",  1920))
-    src_h  = safe_int((vs or {}).get("height", 1080))
-    src_bps = safe_int((vs or {}).get("bit_rate")) or (sz*8/max(dur,1))
-    src_kbps = src_bps / 1000
-    pixels   = max(src_w * src_h, 1)
-    bpp      = src_kbps / pixels  # bits per pixel per second
+def _smart_core(src_w: int, src_h: int, src_kbps: float, dur: float
+                ) -> Tuple[int, float, int, float]:
+    """Pure arithmetic behind the smart preset: (crf, bpp, tier, est_mb).
+
+    tier indexes _SMART_TIERS; 0 means keep the original resolution.
+    Kept free of dicts and I/O so it is trivially cacheable/JIT-able,
+    though at one call per file plain Python is already instant.
+    """
+    pixels = max(src_w * src_h, 1)
+    bpp    = src_kbps / pixels  # bits per pixel per second
 
     # CRF based on how compressed the source already is
     if bpp > 0.5:   crf = 18    # very uncompressed (ProRes/raw)
@@ -483,19 +721,36 @@ def compute_smart_preset(info: dict) -> dict:
     else:           crf = 26    # already heavily compressed
 
     # Resolution recommendation
-    rec_res = None
-    reason  = ""
-    if src_w >= 3840 and bpp < 0.05:
-        rec_res = (1920,1080); reason = "4K @ low bitrate → 1080p"
-    elif src_w >= 2560 and bpp < 0.04:
-        rec_res = (1920,1080); reason = "1440p @ low bitrate → 1080p"
-    elif src_w >= 1920 and src_kbps < 1500:
-        rec_res = (1280,720);  reason = "1080p @ low bitrate → 720p"
+    tier = 0
+    if src_w >= 3840 and bpp < 0.05:        tier = 1
+    elif src_w >= 2560 and bpp < 0.04:      tier = 2
+    elif src_w >= 1920 and src_kbps < 1500: tier = 3
 
     # Estimate output size
     est_ratio = 0.55 * (0.75 ** (crf - 18))
     est_kbps  = src_kbps * est_ratio
     est_mb    = est_kbps * 1000 * dur / (8*1024*1024) if dur > 0 else 0
+    return crf, bpp, tier, est_mb
+
+_SMART_TIERS = (
+    (None,        ""),
+    ((1920,1080), "4K @ low bitrate → 1080p"),
+    ((1920,1080), "1440p @ low bitrate → 1080p"),
+    ((1280,720),  "1080p @ low bitrate → 720p"),
+)
+
+def compute_smart_preset(info: dict) -> dict:
+    preset = dict(PRESETS["smart"])
+    vs     = video_stream(info)
+    dur    = file_duration(info)
+    sz     = file_size_bytes(info)
+    src_w  = safe_int((vs or {}).get("width",  1920))
+    src_h  = safe_int((vs or {}).get("height", 1080))
+    src_bps = safe_int((vs or {}).get("bit_rate")) or (sz*8/max(dur,1))
+    src_kbps = src_bps / 1000
+
+    crf, bpp, tier, est_mb = _smart_core(src_w, src_h, src_kbps, dur)
+    rec_res, reason = _SMART_TIERS[tier]
 
     rows = [
         ("Source bitrate",     f"{src_kbps:.0f} kb/s"),
@@ -520,22 +775,119 @@ def compute_smart_preset(info: dict) -> dict:
 # SMART RESOLUTION RECOMMENDATION
 # ════════════════════════════════════════════════════════════════════════
 
+# Tiers ascending by minimum video kb/s — bisect picks the right one
+_RES_TIERS = [
+    (100, 640, 360, "360p"),(200, 854, 480, "480p"),
+    (500, 1280, 720, "720p"),(1500, 1920, 1080, "1080p"),
+    (4000, 2560, 1440, "1440p"),(8000, 3840, 2160, "4K"),
+]
+_RES_TIER_KBPS = [t[0] for t in _RES_TIERS]
+
 def recommend_resolution(target_mb: float, duration_s: float,
                          audio_kbps: int, src_w: int, src_h: int
                          ) -> Tuple[Optional[Tuple[int,int]], str]:
     if duration_s <= 0: return None, "unknown duration"
     vkbps = target_video_kbps(target_mb, duration_s, audio_kbps)
-    thresholds = [
-        (3840,2160,8000,"4K"),(2560,1440,4000,"1440p"),
-        (1920,1080,1500,"1080p"),(1280,720,500,"720p"),
-        (854,480,200,"480p"),(640,360,100,"360p"),
-    ]
-    for w, h, min_k, label in thresholds:
-        if vkbps >= min_k and src_w >= w and src_h >= h:
+    idx = bisect.bisect_right(_RES_TIER_KBPS, vkbps) - 1
+    while idx >= 0:
+        _, w, h, label = _RES_TIERS[idx]
+        if src_w >= w and src_h >= h:
             res = (w,h) if (w < src_w or h < src_h) else None
             return res, f"~{vkbps} kb/s → [bold]{label}[/] recommended"
+        idx -= 1   # source smaller than this tier — step down
     return (640,360), f"~{vkbps} kb/s very low → [yellow]360p[/] minimum"
 
+# ════════════════════════════════════════════════════════════════════════
+# ASYNC SUBPROCESS HELPERS
+# ════════════════════════════════════════════════════════════════════════
+
+async def _run_quiet_async(cmd: List[str], timeout: Optional[float] = None) -> int:
+    """Launch one command silently, return its exit code (-1 on timeout)."""
+    import asyncio
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    try:
+        return await asyncio.wait_for(proc.wait(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return -1
+
+def run_cmds_quiet(cmds: List[List[str]], timeout: Optional[float] = None,
+                   max_parallel: Optional[int] = None) -> List[int]:
+    """
+    Run several independent commands concurrently (no output), driven by one
+    event loop instead of blocking on each in turn. Returns exit codes in
+    input order.
+    """
+    # asyncio is one of the heaviest stdlib imports and only the CRF-search
+    # path comes through here — keep it off the interactive startup
+    import asyncio
+    async def _gather():
+        sem = asyncio.Semaphore(max_parallel or len(cmds))
+        async def one(c):
+            async with sem:
+                return await _run_quiet_async(c, timeout)
+        return await asyncio.gather(*(one(c) for c in cmds))
+    return asyncio.run(_gather())
+
+# ════════════════════════════════════════════════════════════════════════
+# CRF SEARCH FOR TARGET SIZE
+# ════════════════════════════════════════════════════════════════════════
+
+def find_crf_for_size(input_path: str, info: dict, target_mb: float,
+                      preset: dict) -> Optional[int]:
+    """
+    Binary-search the smallest CRF whose extrapolated size fits target_mb.
+
+    Encodes three short samples (20/50/80% into the timeline) per probe
+    CRF, scales the sample bytes to the full duration and bisects CRF over
+    [18, 40]. A single-pass encode at the found CRF replaces both passes —
+    roughly half the encode time at steadier quality.
+    """
+    dur = file_duration(info)
+    if dur <= 0: return None
+    seg    = min(10.0, max(1.0, dur / 3))
+    starts = [dur * p for p in (0.2, 0.5, 0.8)]
+    codec  = preset.get("codec") or "libx264"
+    sp     = preset.get("speed") or "medium"
+    akbps  = preset.get("audio_kbps") or 128
+    audio_bytes = akbps * 1000 * dur / 8
+    budget = target_mb * BITRATE_SAFETY * 1024 * 1024 - audio_bytes
+    if budget <= 0: return None
+
+    def estimate_bytes(crf: int) -> Optional[int]:
+        cmds, outs = [], []
+        for st in starts:
+            tf = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False); tf.close()
+            outs.append(tf.name)
+            cmds.append([FFMPEG,"-hide_banner","-y","-ss",str(st),"-t",str(seg),
+                         "-i",input_path,"-c:v",codec,"-crf",str(crf),
+                         "-preset",sp,"-an",outs[-1]])
+        try:
+            rcs = run_cmds_quiet(cmds, timeout=120)
+            if any(rc != 0 for rc in rcs): return None
+            sample = sum(os.path.getsize(o) for o in outs)
+            return int(sample * dur / (seg * len(outs)))
+        except Exception:
+            return None
+        finally:
+            for o in outs:
+                try: os.unlink(o)
+                except OSError: pass
+
+    lo, hi, best = 18, 40, None
+    with console.status("[cyan]Searching CRF for target size …[/]"):
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            est = estimate_bytes(mid)
+            if est is None: return None
+            if est <= budget:
+                best = mid; hi = mid - 1
+            else:
+                lo = mid + 1
+    return best
+
 # ════════════════════════════════════════════════════════════════════════
 # PREVIEW ENCODE (5-second test clip with PSNR)
 # ════════════════════════════════════════════════════════════════════════
@@ -554,18 +906,17 @@ def run_preview(input_path: str, preset: dict, info: dict) -> bool:
     console.print(f"\n  [bold cyan]Preview Encode[/]  [dim]({length:.0f}s starting at {human_dur(start)})[/]")
     tmpdir = tempfile.mkdtemp(prefix="fftoolbox_prev_")
     tmp_out = os.path.join(tmpdir, "preview.mp4")
-    tmp_ref = os.path.join(tmpdir, "reference.mp4")
 
     try:
-        p2 = deepcopy(preset)
+        p2 = dict(preset)   # values are scalars/tuples — no deep copy needed
         p2["two_pass"] = False
         if p2.get("target_mb"): p2["crf"] = 23; p2["target_mb"] = None
 
         vf_list = build_vf_list(p2, src_w, src_h)
         co = p2.get("codec") or "libx264"
-        if co in ("copy", None): co = "libx264"; p2["crf"] = 22
+        if co == "copy": co = "libx264"; p2["crf"] = 22
 
-        cmd = ["ffmpeg","-hide_banner","-y","-ss",str(start),"-t",str(length),"-i",input_path]
+        cmd = [FFMPEG,"-hide_banner","-y","-ss",str(start),"-t",str(length),"-i",input_path]
         if vf_list: cmd += ["-vf", ",".join(vf_list)]
         cmd += ["-map","0:v","-map","0:a?"]
 
@@ -578,8 +929,7 @@ def run_preview(input_path: str, preset: dict, info: dict) -> bool:
 
         cmd += ["-crf", str(p2.get("crf",23))]
         sp = p2.get("speed") or "fast"
-        HW = {"nvenc","vaapi","qsv","videotoolbox","amf"}
-        if not any(h in co for h in HW): cmd += ["-preset", sp]
+        if not _is_hw_codec(co): cmd += ["-preset", sp]
 
         ac = p2.get("audio_codec") or "aac"
         ab = p2.get("audio_kbps") or 128
@@ -587,13 +937,20 @@ def run_preview(input_path: str, preset: dict, info: dict) -> bool:
             cmd += ["-c:a", ac, "-b:a", f"{ab}k"]
         else:
             cmd += ["-c:a", ac]
-        cmd += [tmp_out]
+        # -psnr makes the encoder score itself against its input frames, so
+        # quality comes out of the same process as the clip — no second
+        # decode pass needed.
+        cmd += ["-psnr", tmp_out]
 
         with console.status("[cyan]Encoding preview clip …[/]"):
-            r = subprocess.run(cmd, stdout=subprocess.DEVNULL,
-                               stderr=subprocess.DEVNULL, timeout=120)
+            try:
+                pv = subprocess.run(cmd, stdout=_DEVNULL,
+                                    stderr=subprocess.PIPE, text=True, timeout=120)
+                rc_prev, prev_log = pv.returncode, pv.stderr
+            except subprocess.TimeoutExpired:
+                rc_prev, prev_log = -1, ""
 
-        if r.returncode != 0 or not os.path.exists(tmp_out):
+        if rc_prev != 0 or not os.path.exists(tmp_out):
             console.print("  [yellow]Preview failed — continuing anyway.[/]"); return True
 
         prev_sz   = os.path.getsize(tmp_out)
@@ -603,30 +960,18 @@ def run_preview(input_path: str, preset: dict, info: dict) -> bool:
         est_mb = (preset.get("target_mb") or
                   (prev_kbps * 1000 * dur / (8*1024*1024) if dur > 0 else 0))
 
-        # PSNR via ffmpeg (optional)
+        # PSNR from the encoder summary (optional — not every codec reports)
         psnr_str = ""
         try:
-            with console.status("[dim]Computing quality …[/]"):
-                ref_cmd = ["ffmpeg","-hide_banner","-y","-ss",str(start),"-t",str(length),
-                           "-i",input_path,"-c:v","libx264","-crf","0",
-                           "-preset","ultrafast","-an",tmp_ref]
-                rr = subprocess.run(ref_cmd, stdout=subprocess.DEVNULL,
-                                    stderr=subprocess.DEVNULL, timeout=30)
-            if rr.returncode == 0:
-                pr = subprocess.run(
-                    ["ffmpeg","-hide_banner","-i",tmp_out,"-i",tmp_ref,
-                     "-lavfi","psnr","-f","null","-"],
-                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-                    text=True, timeout=30)
-                m = re.search(r"average:([\d.]+)", pr.stderr)
-                if m:
-                    v = float(m.group(1))
-                    q = ("[bold green]Excellent[/]" if v >= 45 else
-                         "[green]Very Good[/]" if v >= 40 else
-                         "[yellow]Good[/]" if v >= 35 else
-                         "[yellow]Acceptable[/]" if v >= 30 else
-                         "[red]Poor[/]")
-                    psnr_str = f"{v:.1f} dB — {q}"
+            m = re.search(r"PSNR Mean.*?Avg:([\d.]+)", prev_log)
+            if m:
+                v = float(m.group(1))
+                q = ("[bold green]Excellent[/]" if v >= 45 else
+                     "[green]Very Good[/]" if v >= 40 else
+                     "[yellow]Good[/]" if v >= 35 else
+                     "[yellow]Acceptable[/]" if v >= 30 else
+                     "[red]Poor[/]")
+                psnr_str = f"{v:.1f} dB — {q}"
         except Exception: pass
 
         tbl = Table(box=box.ROUNDED, border_style="dim", show_header=False, padding=(0,1))
@@ -674,12 +1019,12 @@ def pick_audio_format() -> Tuple[str, Dict[str, Any]]:
     console.print(tbl)
     c = Prompt.ask("Format", choices=[str(i) for i in range(1, len(keys)+1)], default="1")
     key = keys[int(c)-1]
-    fmt = deepcopy(AUDIO_FORMATS[key])
+    fmt = dict(AUDIO_FORMATS[key])
 
     if key not in ("flac","wav"):
         console.print(f"  [dim]Guide: {guides.get(key,'')}[/]")
         default_br = {"mp3":"192","aac":"192","opus":"128","ogg":"192"}.get(key,"192")
-        fmt["bitrate"] = int(Prompt.ask("Bitrate kb/s", default=default_br))
+        fmt["bitrate"] = ask_int("Bitrate kb/s", int(default_br), 8, 1024)
     else:
         fmt["bitrate"] = None
 
@@ -695,24 +1040,25 @@ def extract_audio(files: List[str], infos: Dict[str, Optional[dict]],
     console.print(Rule("[bold cyan]Extracting Audio[/]"))
 
     for i, fpath in enumerate(files, 1):
+        base = os.path.basename(fpath)      # one parse, not one per message
         fi = infos.get(fpath) or run_ffprobe(fpath)
         if not fi:
-            console.print(f"  [{i}/{len(files)}] [red]Cannot read: {escape(Path(fpath).name)}[/]")
+            console.print(f"  [{i}/{len(files)}] [red]Cannot read: {escape(base)}[/]")
             failed += 1; continue
 
         as_ = audio_stream(fi)
         if not as_:
-            console.print(f"  [{i}/{len(files)}] [yellow]No audio track: {escape(Path(fpath).name)}[/]")
+            console.print(f"  [{i}/{len(files)}] [yellow]No audio track: {escape(base)}[/]")
             failed += 1; continue
 
-        out_name = Path(fpath).stem + fmt["ext"]
+        out_name = os.path.splitext(base)[0] + fmt["ext"]
         out_path = os.path.join(output_dir, out_name)
         out_path = _unique_path(out_path)
 
-        console.print(f"\n  [bold][{i}/{len(files)}][/]  {escape(Path(fpath).name)}")
+        console.print(f"\n  [bold][{i}/{len(files)}][/]  {escape(base)}")
 
         dur = file_duration(fi)
-        cmd = ["ffmpeg","-hide_banner","-y","-i",fpath,"-vn"]
+        cmd = [FFMPEG,"-hide_banner","-y","-i",fpath,"-vn"]
 
         co = fmt["codec"]
         if fmt.get("bitrate"):
@@ -740,20 +1086,24 @@ def convert_audio(files: List[str], output_dir: str) -> Tuple[int, int]:
     console.print()
     console.print(Rule("[bold cyan]Converting Audio[/]"))
 
+    infos: Dict[str, Optional[dict]] = {}
+    batch_probe(files, infos)       # probe the batch up front, not per loop turn
+
     for i, fpath in enumerate(files, 1):
-        fi = run_ffprobe(fpath)
+        base = os.path.basename(fpath)
+        fi = infos.get(fpath)
         if not fi:
-            console.print(f"  [{i}/{len(files)}] [red]Cannot read: {escape(Path(fpath).name)}[/]")
+            console.print(f"  [{i}/{len(files)}] [red]Cannot read: {escape(base)}[/]")
             failed += 1; continue
 
-        out_name = Path(fpath).stem + fmt["ext"]
+        out_name = os.path.splitext(base)[0] + fmt["ext"]
         out_path = os.path.join(output_dir, out_name)
         out_path = _unique_path(out_path)
 
-        console.print(f"\n  [bold][{i}/{len(files)}][/]  {escape(Path(fpath).name)}")
+        console.print(f"\n  [bold][{i}/{len(files)}][/]  {escape(base)}")
         dur = file_duration(fi)
 
-        cmd = ["ffmpeg","-hide_banner","-y","-i",fpath]
+        cmd = [FFMPEG,"-hide_banner","-y","-i",fpath]
         if fmt.get("bitrate"):
             cmd += ["-c:a", fmt["codec"], "-b:a", f"{fmt['bitrate']}k"]
         else:
@@ -793,17 +1143,16 @@ def import_preset_menu() -> Optional[Dict[str, Any]]:
     console.print("\n[bold cyan]Saved Presets[/]")
     tbl = Table(box=box.SIMPLE, padding=(0,1), show_header=False)
     tbl.add_column("#", style="bold dim", width=3)
-    tbl.add_column("Name"); tbl.add_column("Details", style="dim")
+    tbl.add_column("Name")
+    # List by filename only — parsing every preset just to decorate the menu
+    # meant N file reads before the first prompt (and a NameError when the
+    # first file was corrupt). The chosen file is parsed below.
     for i, f in enumerate(files, 1):
-        try:
-            d = json.loads(f.read_text())
-            detail = f"codec={d.get('codec','?')} crf={d.get('crf','?')}"
-        except: detail = "?"
-        tbl.add_row(str(i), d.get("_export_name", f.stem), detail)
+        tbl.add_row(str(i), f.stem)
     console.print(tbl)
     c = Prompt.ask("Load #", choices=[str(i) for i in range(1,len(files)+1)])
     try:
-        loaded = json.loads(files[int(c)-1].read_text())
+        loaded = _json_loads(files[int(c)-1].read_bytes())
         for key, default in [("name","Imported"),("emoji","📥"),
                               ("color","white"),("tip","Imported"),("group","Imported")]:
             loaded.setdefault(key, loaded.get("_export_name", default))
@@ -828,6 +1177,7 @@ class UpdateInfo:
     changelog:    str           = ""
     download_url: str           = ""
     error:        Optional[str] = None
+    announced:    bool          = False   # banner printed this run
 
 _update_info = UpdateInfo()
 
@@ -842,6 +1192,10 @@ def _version_tuple(v: str) -> Tuple[int, ...]:
 
 def _fetch_update_info() -> None:
     """Background thread: query GitHub Releases API and fill _update_info."""
+    # urllib.request drags in the whole http/email stack — only the updater
+    # needs it, so it loads here (off the main thread) instead of at startup
+    from urllib.request import urlopen, Request
+    from urllib.error import URLError
     global _update_info
     try:
         req = Request(
@@ -853,7 +1207,7 @@ def _fetch_update_info() -> None:
             },
         )
         with urlopen(req, timeout=4) as r:
-            data = json.loads(r.read().decode())
+            data = _json_loads(r.read())
 
         tag          = data.get("tag_name", "").lstrip("v")
         body         = data.get("body",     "")   # release notes / changelog
@@ -883,9 +1237,12 @@ def _start_update_check() -> None:
 
 
 def show_update_banner() -> None:
-    """Called after banner — shows a notice if an update is waiting."""
-    if not _update_info.available:
+    """Shows a notice once if an update is waiting. Safe to call at every
+    prompt: the check runs on a background thread, so whichever call site
+    the response beats gets to print it."""
+    if not _update_info.available or _update_info.announced:
         return
+    _update_info.announced = True
 
     lines = [
         f"[bold yellow]Update available:[/] v{_update_info.remote_ver}  "
@@ -945,6 +1302,7 @@ def perform_update(interactive: bool = True) -> bool:
     # ── Download ──────────────────────────────────────────────────────
     try:
         console.print("  [dim]Downloading …[/]", end=" ")
+        from urllib.request import urlopen, Request
         req = Request(url, headers={"User-Agent": f"fftoolbox/{APP_VERSION}"})
         with urlopen(req, timeout=30) as r:
             new_code = r.read()
@@ -1053,6 +1411,7 @@ def perform_update(interactive: bool = True) -> bool:
 # ════════════════════════════════════════════════════════════════════════
 
 def print_banner():
+    from rich.align import Align   # one use in the whole module
     console.print()
     console.print(Panel.fit(
         Align.center(
@@ -1064,6 +1423,29 @@ def print_banner():
     ))
     console.print()
 
+def ask_int(msg: str, default: Optional[int] = None,
+            lo: int = 0, hi: int = 10**9) -> int:
+    """Prompt + int() with a range check — a typo re-asks instead of
+    raising ValueError out of the menu."""
+    while True:
+        raw = Prompt.ask(msg, default=str(default)) if default is not None else Prompt.ask(msg)
+        try:
+            v = int(raw)
+            if lo <= v <= hi: return v
+        except ValueError: pass
+        console.print(f"  [red]Enter a whole number between {lo} and {hi}.[/]")
+
+def ask_float(msg: str, default: Optional[float] = None,
+              lo: float = 0.0, hi: float = 1e9) -> float:
+    """Float twin of ask_int."""
+    while True:
+        raw = Prompt.ask(msg, default=str(default)) if default is not None else Prompt.ask(msg)
+        try:
+            v = float(raw)
+            if lo <= v <= hi: return v
+        except ValueError: pass
+        console.print(f"  [red]Enter a number between {lo:g} and {hi:g}.[/]")
+
 def print_file_info(info: dict, path: str):
     vs  = video_stream(info)
     dur = file_duration(info)
@@ -1083,17 +1465,18 @@ def print_file_info(info: dict, path: str):
         bit = vs.get("bit_rate")
         if bit: tbl.add_row("Video bitrate", f"{int(bit)//1000} kb/s")
         vc_disp = (f"[bold yellow]⚠ {vc} (professional — large file)[/]"
-                   if any(p in vc.lower() for p in PROFESSIONAL_CODECS) else vc)
+                   if _is_pro_codec(vc.lower()) else vc)
         tbl.add_row("Video codec", vc_disp)
 
-    for i, as_ in enumerate(all_audio_streams(info)):
+    audios = all_audio_streams(info)
+    for i, as_ in enumerate(audios):
         ac = as_.get("codec_name","?").upper()
         sr = as_.get("sample_rate","?")
         ch = as_.get("channels","?")
         ab = as_.get("bit_rate")
         detail = f"{ac}  {sr}Hz  {ch}ch"
         if ab: detail += f"  {int(ab)//1000}kb/s"
-        tbl.add_row(f"Audio {i+1}" if len(all_audio_streams(info))>1 else "Audio", detail)
+        tbl.add_row(f"Audio {i+1}" if len(audios)>1 else "Audio", detail)
 
     subs = subtitle_streams(info)
     if subs:
@@ -1104,13 +1487,17 @@ def print_file_info(info: dict, path: str):
         tbl.add_row("[yellow]Tip[/]","[yellow]Large file — [bold]Resolve Cleanup[/] or [bold]Smart[/] suggested[/]")
     if vs and safe_int(vs.get("width")) >= 3840:
         tbl.add_row("[dim]Tip[/]","[dim]4K source detected[/]")
-    if is_audio_only(info):
+    audio_only = vs is None and audios    # is_audio_only, minus re-walking
+    if audio_only:
         tbl.add_row("[cyan]Type[/]","[cyan]Audio-only file[/]")
 
-    title = "[bold]Source File[/]" if not is_audio_only(info) else "[bold]Source Audio[/]"
+    title = "[bold]Source File[/]" if not audio_only else "[bold]Source Audio[/]"
     console.print(Panel(tbl, title=title, border_style="cyan", padding=(0,1)))
 
-def show_presets_table(suggested_key: Optional[str] = None):
+@lru_cache(maxsize=8)
+def _preset_table(suggested_key: Optional[str]) -> Panel:
+    """PRESETS is static after import, so the table is built once per
+    suggested key and re-printed from cache on every menu visit."""
     tbl = Table(box=box.SIMPLE_HEAD, border_style="dim", padding=(0,1))
     tbl.add_column("#",      style="bold dim", width=3)
     tbl.add_column("Preset", width=44)
@@ -1125,7 +1512,10 @@ def show_presets_table(suggested_key: Optional[str] = None):
                     f"[{p['color']}]{p['emoji']}  {p['name']}[/]{m}",
                     f"[dim]{p['desc']}[/]")
     tbl.add_row("i", "[dim]Import saved preset[/]", "")
-    console.print(Panel(tbl, title="[bold]Video Presets[/]", border_style="cyan"))
+    return Panel(tbl, title="[bold]Video Presets[/]", border_style="cyan")
+
+def show_presets_table(suggested_key: Optional[str] = None):
+    console.print(_preset_table(suggested_key))
 
 def suggest_preset(info: dict) -> str:
     if is_audio_only(info): return "fix_audio"
@@ -1137,14 +1527,50 @@ def suggest_preset(info: dict) -> str:
     return "web_1080p"
 
 def _unique_path(path: str) -> str:
-    """Return path unchanged if it doesn't exist, else append _1, _2, ..."""
-    if not os.path.exists(path): return path
-    p   = Path(path)
+    """Return path unchanged if it doesn't exist, else append _1, _2, ...
+
+    One scandir of the parent replaces a stat syscall per candidate — a
+    folder with many prior runs otherwise pays for every _N already taken.
+    """
+    p = Path(path)
+    try:
+        with os.scandir(p.parent) as it:
+            taken = {e.name for e in it}
+    except OSError:
+        return path          # parent missing/unreadable — nothing to clash with
+    if p.name not in taken: return path
     for i in range(1, 10000):
-        candidate = str(p.parent / f"{p.stem}_{i}{p.suffix}")
-        if not os.path.exists(candidate): return candidate
+        candidate = f"{p.stem}_{i}{p.suffix}"
+        if candidate not in taken: return str(p.parent / candidate)
     return str(p.parent / f"{p.stem}_{int(time.time())}{p.suffix}")
 
+def _claim_unique_path(path: str) -> str:
+    """Like _unique_path, but actually reserves the name: O_CREAT|O_EXCL
+    creates an empty placeholder atomically, so concurrent encode workers
+    can't pick the same output. ffmpeg -y overwrites the placeholder."""
+    p = Path(path)
+    candidates = [path] + [str(p.parent / f"{p.stem}_{i}{p.suffix}")
+                           for i in range(1, 10000)]
+    for candidate in candidates:
+        try:
+            os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return candidate
+        except FileExistsError:
+            continue
+        except OSError:
+            return _unique_path(path)   # parent missing/odd fs — stat-based fallback
+    return str(p.parent / f"{p.stem}_{int(time.time())}{p.suffix}")
+
+def _unclaim_path(path: str):
+    """Release a name reserved by _claim_unique_path whose encode never ran.
+    Only the 0-byte placeholder is removed — anything ffmpeg started writing
+    is left alone."""
+    try:
+        if os.path.getsize(path) == 0:
+            os.unlink(path)
+    except OSError:
+        pass
+
 # ════════════════════════════════════════════════════════════════════════
 # COLLISION HANDLER
 # ════════════════════════════════════════════════════════════════════════
@@ -1157,7 +1583,7 @@ def handle_collision(out_path: str) -> Optional[str]:
     console.print("  [cyan]4[/]  Skip this file")
     c = Prompt.ask("  Choice", choices=["1","2","3","4"], default="2")
     if c == "1": return out_path
-    if c == "2": return _unique_path(out_path)
+    if c == "2": return _claim_unique_path(out_path)
     if c == "3":
         raw = Prompt.ask("  New filename (no extension)").strip()
         if not raw: return None
@@ -1166,10 +1592,75 @@ def handle_collision(out_path: str) -> Optional[str]:
         return new
     return None  # skip
 
+# ════════════════════════════════════════════════════════════════════════
+# MEDIA FILE WALKER
+# ════════════════════════════════════════════════════════════════════════
+
+def iter_media_files(root, extensions: set, recursive: bool = True,
+                     skip_dirs: Tuple[str, ...] = ("_originals",)):
+    """
+    Lazily yield media files under `root` via os.scandir — no full-tree
+    list in memory and no extra stat per entry (DirEntry carries the file
+    type). Hidden directories and backup folders are pruned.
+    """
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not name.startswith(".") and name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif _media_ext(name) in extensions:
+                        yield entry.path
+        except OSError:
+            continue
+
+def fingerprint(path: str) -> Optional[bytes]:
+    """Cheap content fingerprint: blake2b of the first 64 KB + file size.
+    Enough to recognize hardlinks and byte-identical copies without
+    reading whole media files."""
+    try:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            h.update(f.read(65536))
+        h.update(str(os.path.getsize(path)).encode())
+        return h.digest()
+    except OSError:
+        return None
+
+def dedup_files(files: List[str]) -> List[str]:
+    """Drop files whose fingerprint matches an earlier entry, so a batch
+    never spends a full encode on the same content twice."""
+    seen: Dict[bytes, str] = {}
+    kept: List[str] = []
+    for f in files:
+        fp = fingerprint(f)
+        if fp is None or seen.setdefault(fp, f) == f:
+            kept.append(f)
+        else:
+            console.print(f"  [dim]≡ {escape(Path(f).name)} duplicates "
+                          f"{escape(Path(seen[fp]).name)} — skipped[/]")
+    return kept
+
 # ════════════════════════════════════════════════════════════════════════
 # FILE BROWSER  (numbers + direct paths + search + recent)
 # ════════════════════════════════════════════════════════════════════════
 
+@lru_cache(maxsize=4096)
+def _count_media(path: str, mtime_ns: int, extensions: frozenset) -> int:
+    """Media files directly inside `path`. The directory mtime is part of
+    the key, so the cache self-invalidates when the folder changes — redraws
+    of the browser stop re-reading every visible subdirectory."""
+    c = 0
+    with os.scandir(path) as it:
+        for x in it:
+            if x.is_file() and _media_ext(x.name) in extensions:
+                c += 1
+    return c
+
 def file_browser(start: str = "~", history: Optional[Dict] = None,
                  audio_mode: bool = False) -> Optional[List[str]]:
     """
@@ -1189,14 +1680,24 @@ def file_browser(start: str = "~", history: Optional[Dict] = None,
         console.print()
         console.print(Rule(f"[bold cyan]📁  Browser[/]  [dim]{escape(str(current))}[/]"))
 
+        # scandir hands back DirEntry objects whose type/stat come from the
+        # directory read itself — one pass partitions straight into the two
+        # lists the table needs (dirs first, then media, each name-sorted)
+        dirs  = []
+        media = []   # (DirEntry, extension) — split the suffix once per file
         try:
-            raw = sorted(current.iterdir(), key=lambda p:(p.is_file(), p.name.lower()))
+            with os.scandir(current) as it:
+                for e in it:
+                    if e.is_dir():
+                        if not e.name.startswith("."): dirs.append(e)
+                    elif e.is_file():
+                        ext = _media_ext(e.name)
+                        if ext in extensions: media.append((e, ext))
         except PermissionError:
             console.print("[red]  Permission denied[/]"); current = current.parent; continue
-
-        dirs   = [e for e in raw if e.is_dir()  and not e.name.startswith(".")]
-        media  = [e for e in raw if e.is_file() and e.suffix.lower() in extensions]
-        items: List[Tuple[Path, bool]] = []
+        dirs.sort(key=lambda e: e.name.lower())
+        media.sort(key=lambda t: t[0].name.lower())
+        items: List[Tuple[str, bool]] = []
 
         tbl = Table(box=box.SIMPLE, show_header=True, padding=(0,1))
         tbl.add_column("#",    style="bold dim", width=4)
@@ -1205,27 +1706,33 @@ def file_browser(start: str = "~", history: Optional[Dict] = None,
         tbl.add_column("Info", style="dim", width=12)
 
         tbl.add_row("0","[bold]↑  .. (go up)[/]","","")
-        items.append((current.parent, True))
+        items.append((str(current.parent), True))
 
         for d in dirs[:40]:
             n = len(items)
             try:
-                cnt = sum(1 for x in d.iterdir()
-                          if x.is_file() and x.suffix.lower() in extensions)
+                cnt = _count_media(d.path, d.stat().st_mtime_ns, extensions)
                 info_s = f"{cnt} file{'s' if cnt!=1 else ''}" if cnt else ""
-            except: info_s = ""
-            tbl.add_row(str(n), f"[yellow]📁  {escape(d.name)}[/]", "", info_s)
-            items.append((d, True))
+            except OSError: info_s = ""
+            dn = escape(d.name) if "[" in d.name or "\\" in d.name else d.name
+            tbl.add_row(str(n), f"[yellow]📁  {dn}[/]", "", info_s)
+            items.append((d.path, True))
 
         if not media:
             tbl.add_row("", "[dim]  — no media files here —[/]","","")
-        for f in media:
+        for f, ext in media[:200]:
             n = len(items)
-            ext_tag = f.suffix.upper().lstrip(".")
-            color = "green" if f.suffix.lower() in VIDEO_EXTENSIONS else "bright_blue"
-            tbl.add_row(str(n), f"[{color}]{'🎬' if f.suffix.lower() in VIDEO_EXTENSIONS else '🎵'}  {escape(f.name)}[/]",
-                        human_size(f.stat().st_size), ext_tag)
-            items.append((f, False))
+            is_video = ext in VIDEO_EXTENSIONS
+            color = "green" if is_video else "bright_blue"
+            # escape() only matters for markup chars — rare in filenames;
+            # DirEntry.stat() reuses the stat cached by the directory read
+            fn = escape(f.name) if "[" in f.name or "\\" in f.name else f.name
+            tbl.add_row(str(n), f"[{color}]{'🎬' if is_video else '🎵'}  {fn}[/]",
+                        human_size(f.stat().st_size), ext[1:].upper())
+            items.append((f.path, False))
+        if len(media) > 200:
+            # same cap idea as the 40-dir limit — 'a' still selects everything
+            tbl.add_row("", f"[dim]  … and {len(media)-200} more — 'a' selects all[/]","","")
 
         console.print(tbl)
         console.print()
@@ -1276,13 +1783,15 @@ def file_browser(start: str = "~", history: Optional[Dict] = None,
         if low == "a":
             if media:
                 console.print(f"[green]  ✓  {len(media)} file(s) selected[/]")
-                return [str(f) for f in media]
+                return [f.path for f, _ in media]
             console.print("[yellow]  No media files here.[/]"); continue
 
         # ── Recursive ─────────────────────────────────────────────────
         if raw_in.upper() == "R":
-            found = [str(f) for f in sorted(current.rglob("*"))
-                     if f.is_file() and f.suffix.lower() in extensions]
+            # iter_media_files streams matches; only the filtered list is
+            # ever materialized (for sorting) — big trees stay off the heap
+            with console.status(f"[cyan]Scanning {escape(str(current))} recursively …[/]"):
+                found = sorted(iter_media_files(current, extensions), key=str.lower)
             if found:
                 console.print(f"[green]  ✓  {len(found)} file(s) found recursively[/]")
                 return found
@@ -1303,8 +1812,9 @@ def file_browser(start: str = "~", history: Optional[Dict] = None,
 
         # ── Partial name search ────────────────────────────────────────
         if raw_in and not raw_in.isdigit():
-            matches = [f for f in media if raw_in.lower() in f.name.lower()]
-            if len(matches) == 1: return [str(matches[0])]
+            q = raw_in.lower()   # once, not per file
+            matches = [f for f, _ in media if q in f.name.lower()]
+            if len(matches) == 1: return [matches[0].path]
             if matches:
                 console.print(f"  [yellow]{len(matches)} matches:[/]")
                 for m in matches[:6]: console.print(f"  [dim]{m.name}[/]")
@@ -1318,8 +1828,8 @@ def file_browser(start: str = "~", history: Optional[Dict] = None,
         if idx < 0 or idx >= len(items):
             console.print(f"[red]  Out of range (0–{len(items)-1}).[/]"); continue
         path, is_dir = items[idx]
-        if is_dir: current = path.resolve()
-        else:      return [str(path)]
+        if is_dir: current = Path(path).resolve()
+        else:      return [path]
 
 # ════════════════════════════════════════════════════════════════════════
 # RESOLUTION PICKER
@@ -1348,14 +1858,12 @@ def pick_resolution(src_w=None, src_h=None,
     elif default_res:
         for i,(w,h,_) in enumerate(RESOLUTIONS):
             if (w,h)==default_res: di=i; break
-    c = Prompt.ask("Choice",
-                   choices=[str(i) for i in range(len(RESOLUTIONS)+1)],
-                   default=str(di))
+    c = Prompt.ask("Choice", choices=_RES_CHOICES, default=str(di))
     idx = int(c)
     if idx == 0: return None
     if idx < len(RESOLUTIONS):
         w,h,_ = RESOLUTIONS[idx]; return (w,h) if w else None
-    w = int(Prompt.ask("  Width (px)")); h = int(Prompt.ask("  Height (px)"))
+    w = ask_int("  Width (px)", lo=16, hi=16384); h = ask_int("  Height (px)", lo=16, hi=16384)
     return ((w//2)*2,(h//2)*2)
 
 # ════════════════════════════════════════════════════════════════════════
@@ -1398,18 +1906,17 @@ def build_custom_preset(info: Optional[dict]) -> dict:
         qm = Prompt.ask("Mode", choices=["1","2","3"], default="1")
         if qm == "1":
             console.print("  [dim]0=lossless · 15=excellent · 18=high · 23=default · 28=compact · 33=tiny[/]")
-            preset["crf"] = int(Prompt.ask("CRF", default="23"))
+            preset["crf"] = ask_int("CRF", 23, 0, 51)
         elif qm == "2":
-            tgt = float(Prompt.ask("Target MB", default="100"))
+            tgt = ask_float("Target MB", 100, 1, 1e6)
             preset["target_mb"] = tgt; preset["two_pass"] = True
             console.print(f"  [dim]Safety margin ({BITRATE_SAFETY*100:.0f}%): actual target ≈ {tgt*BITRATE_SAFETY:.0f} MB[/]")
         else:
-            pct = float(Prompt.ask("Keep what % (e.g. 30)", default="30"))
+            pct = ask_float("Keep what % (e.g. 30)", 30, 1, 100)
             preset["_pct"] = pct/100.0; preset["two_pass"] = True
 
         # Speed
-        HW = {"nvenc","vaapi","qsv","videotoolbox","amf"}
-        if not any(h in preset["codec"] for h in HW):
+        if not _is_hw_codec(preset["codec"]):
             console.print("\n[bold cyan]Encode Speed[/]")
             speed_map = {"1":"ultrafast","2":"superfast","3":"veryfast","4":"faster",
                          "5":"fast","6":"medium","7":"slow","8":"slower","9":"veryslow"}
@@ -1465,7 +1972,7 @@ def build_custom_preset(info: Optional[dict]) -> dict:
     if preset["audio_codec"] == "__none__":
         preset["audio_codec"] = None; preset["_no_audio"] = True
     elif preset["audio_codec"] not in ("copy","flac","pcm_s16le","pcm_s24le"):
-        preset["audio_kbps"] = int(Prompt.ask("Audio kb/s", default="192"))
+        preset["audio_kbps"] = ask_int("Audio kb/s", 192, 8, 1024)
 
     if info and len(all_audio_streams(info)) > 1:
         console.print(f"\n  [yellow]⚠  {len(all_audio_streams(info))} audio tracks found.[/]")
@@ -1484,7 +1991,7 @@ def build_custom_preset(info: Optional[dict]) -> dict:
 # ════════════════════════════════════════════════════════════════════════
 
 def configure_preset(key: str, preset: dict, info: Optional[dict]) -> dict:
-    preset = deepcopy(preset)
+    preset = dict(preset)
 
     if key == "smart":
         if info:
@@ -1526,9 +2033,13 @@ def configure_preset(key: str, preset: dict, info: Optional[dict]) -> dict:
             "WhatsApp: [bold]100 MB[/]  ·  Telegram: [bold]2 GB[/]  ·  Email: [bold]25 MB[/][/]",
             border_style="dim",title="[dim]Target Size Info[/]",
         ))
-        tgt = float(Prompt.ask("Target MB", default="100"))
+        tgt = ask_float("Target MB", 100, 1, 1e6)
         preset["target_mb"] = tgt
         console.print(f"  [dim]Internal target: {tgt*BITRATE_SAFETY:.1f} MB ({BITRATE_SAFETY*100:.0f}% safety)[/]")
+        console.print("  [cyan]1[/]  Two-pass  (bitrate-exact)")
+        console.print("  [cyan]2[/]  CRF search  (samples the video first · ~2× faster · steadier quality)")
+        if Prompt.ask("  Method", choices=["1","2"], default="1") == "2":
+            preset["_crf_search"] = True
         vs    = video_stream(info) if info else None
         src_w = safe_int((vs or {}).get("width",1920))  if vs else 1920
         src_h = safe_int((vs or {}).get("height",1080)) if vs else 1080
@@ -1543,7 +2054,7 @@ def configure_preset(key: str, preset: dict, info: Optional[dict]) -> dict:
         if sz > 0:
             console.print(f"  [dim]Source: {sz/1024/1024:.1f} MB[/]")
             console.print("  [dim]10 = tiny  ·  30 = aggressively smaller  ·  50 = half  ·  80 = subtle[/]")
-        pct = float(Prompt.ask("Keep what % of original?", default="30"))
+        pct = ask_float("Keep what % of original?", 30, 1, 100)
         preset["_pct"] = pct/100.0
         if sz > 0:
             est_tgt = sz/1024/1024 * pct/100.0
@@ -1565,7 +2076,7 @@ def configure_preset(key: str, preset: dict, info: Optional[dict]) -> dict:
             preset["target_mb"] = None; preset["max_res"] = None
             preset["crf"] = 20; preset["two_pass"] = False
         else:
-            tgt = float(Prompt.ask("  Target MB", default="95"))
+            tgt = ask_float("  Target MB", 95, 1, 1e6)
             preset["target_mb"] = tgt
             console.print(f"  [dim]Safety margin: internal target {tgt*BITRATE_SAFETY:.0f} MB[/]")
 
@@ -1577,6 +2088,22 @@ def configure_preset(key: str, preset: dict, info: Optional[dict]) -> dict:
     elif key == "custom":
         preset = build_custom_preset(info)
 
+    # HW promotion: CRF-style x264/x265 presets can ride a hardware encoder
+    # when the machine has one — typically several times realtime faster at
+    # slightly larger files. Size-targeted presets stay on software (HW rate
+    # control isn't bitrate-exact enough for the under-target guarantee),
+    # and the custom path already offers HW codecs itself.
+    co = preset.get("codec")
+    if (key != "custom" and co in ("libx264","libx265")
+            and not preset.get("two_pass") and not preset.get("target_mb")
+            and not preset.get("_pct")):
+        want = "hevc" if co == "libx265" else "h264"
+        hw = [(e,l) for e,l in detect_hw_encoders() if e.startswith(want)]
+        if hw and Confirm.ask(
+                f"  {hw[0][1]} detected — encode on it? (faster, slightly bigger files)",
+                default=True):
+            preset["codec"] = hw[0][0]   # encode_file still verifies via hw_fallback
+
     return preset
 
 # ════════════════════════════════════════════════════════════════════════
@@ -1587,14 +2114,41 @@ def build_vf_list(preset: dict, src_w, src_h) -> List[str]:
     f = []
     if preset.get("_deinterlace"): f.append("yadif=mode=1")
     if preset.get("_denoise"):     f.append("hqdn3d=4:3:6:4.5")
+    has_scale = False
     mr = preset.get("max_res")
     if mr and src_w and src_h:
-        sf = scale_vf(src_w, src_h, mr)
-        if sf: f.append(sf)
-    if not any("scale=" in x for x in f):
+        sf = scale_vf(src_w, src_h, mr)   # already emits even dimensions
+        if sf: f.append(sf); has_scale = True
+    elif mr:
+        # Probe gave no dimensions — let the scale filter do the fit-inside
+        # math in C instead of silently keeping the original resolution.
+        # min() caps without upscaling; \, keeps the comma out of the
+        # filter-chain parser.
+        mw, mh = mr
+        f.append(f"scale=min({mw}\\,iw):min({mh}\\,ih)"
+                 ":force_original_aspect_ratio=decrease"
+                 ":force_divisible_by=2:flags=lanczos")
+        has_scale = True
+    if not has_scale and not (src_w and src_h and
+                              src_w % 2 == 0 and src_h % 2 == 0):
+        # Even-dimension guard, only when the probe couldn't promise it —
+        # a known-even source would pay a no-op libswscale pass otherwise
         f.append("scale=trunc(iw/2)*2:trunc(ih/2)*2")
     return f
 
+@lru_cache(maxsize=32)
+def _audio_args(ac: str, ab: Optional[int]) -> Tuple[str, ...]:
+    """Audio argv fragment for a (codec, kb/s) pair — one fragment per
+    preset, so a batch of 500 files builds it once."""
+    if ac in ("copy","flac","pcm_s16le","pcm_s24le","pcm_s32le"):
+        args = ["-c:a", ac]
+        if "pcm" in ac: args += ["-ar","48000"]
+    else:
+        args = ["-c:a", ac]
+        if ab: args += ["-b:a", f"{ab}k"]
+        args += ["-ar","48000"]
+    return tuple(args)
+
 def build_cmd(input_path: str, output_path: str, preset: dict,
               src_w, src_h, video_kbps=None,
               pass_num: int = 0, passlog: Optional[str] = None) -> List[str]:
@@ -1604,9 +2158,24 @@ def build_cmd(input_path: str, output_path: str, preset: dict,
     if not output_path.endswith(out_ext):
         output_path = str(Path(output_path).with_suffix(out_ext))
 
-    cmd = ["ffmpeg","-hide_banner","-y","-i",input_path]
     co  = preset.get("codec") or "libx264"
-    HW  = {"nvenc","vaapi","qsv","videotoolbox","amf"}
+    sw_filters = preset.get("_deinterlace") or preset.get("_denoise")
+    # Full-GPU decode only when encode_file verified the source codec
+    # against _hw_decodable — -hwaccel on a ProRes/DNxHD source silently
+    # falls back to software decode and the device scale filter then
+    # aborts on system-memory frames, failing the whole encode.
+    hw_decode = preset.get("_hw_decode") and not sw_filters
+
+    # Build the argv in one list, appending option groups in order — input
+    # flags are decided up front so nothing gets spliced in later.
+    cmd = [FFMPEG,"-hide_banner","-y"]
+    if "vaapi" in co:
+        cmd += ["-vaapi_device", VAAPI_DEVICE]
+    elif "nvenc" in co and hw_decode:
+        cmd += ["-hwaccel","cuda","-hwaccel_output_format","cuda"]
+    elif "qsv" in co and hw_decode:
+        cmd += ["-hwaccel","qsv","-hwaccel_output_format","qsv"]
+    cmd += ["-i", input_path]
 
     # Metadata preservation
     if preset.get("_copy_meta"): cmd += ["-map_metadata","0"]
@@ -1624,21 +2193,33 @@ def build_cmd(input_path: str, output_path: str, preset: dict,
             cmd += ["-map","0:s?","-c:s","copy"]
 
         if not preset.get("_no_audio"):
-            ac = preset.get("audio_codec") or "aac"
-            ab = preset.get("audio_kbps")
-            if ac in ("copy","flac","pcm_s16le","pcm_s24le","pcm_s32le"):
-                cmd += ["-c:a", ac]
-                if "pcm" in ac: cmd += ["-ar","48000"]
-            else:
-                cmd += ["-c:a", ac]
-                if ab: cmd += ["-b:a", f"{ab}k"]
-                cmd += ["-ar","48000"]
+            cmd += _audio_args(preset.get("audio_codec") or "aac",
+                               preset.get("audio_kbps"))
 
         if out_ext == ".mp4": cmd += ["-movflags","+faststart"]
         cmd += [output_path]; return cmd
 
     # ── Video filters ─────────────────────────────────────────────────
-    vf = build_vf_list(preset, src_w, src_h)
+    # With a HW encoder and no CPU-only filters, scale on the device too —
+    # otherwise every frame round-trips through system RAM just to resize.
+    hw_dims = None
+    mr = preset.get("max_res")
+    if mr and src_w and src_h:
+        hw_dims = fit_resolution(src_w, src_h, mr)
+
+    if "nvenc" in co and hw_decode:
+        # Decode, scale and encode all on the GPU — frames never cross PCIe
+        # (the -hwaccel cuda input flags were added before -i above)
+        vf = [f"scale_cuda={hw_dims[0]}:{hw_dims[1]}"] if hw_dims else []
+    elif "vaapi" in co and not sw_filters:
+        vf = ["format=nv12","hwupload"]   # upload once, stay on-device
+        if hw_dims: vf.append(f"scale_vaapi={hw_dims[0]}:{hw_dims[1]}")
+    elif "qsv" in co and hw_decode:
+        vf = [f"scale_qsv={hw_dims[0]}:{hw_dims[1]}"] if hw_dims else []
+    else:
+        vf = build_vf_list(preset, src_w, src_h)
+        if "vaapi" in co:
+            vf += ["format=nv12","hwupload"]
     if vf: cmd += ["-vf",",".join(vf)]
 
     # Stream mapping
@@ -1656,38 +2237,58 @@ def build_cmd(input_path: str, output_path: str, preset: dict,
         cmd += ["-c:v","libx264","-profile:v","high","-pix_fmt","yuv420p"]
     elif co == "libx265":
         cmd += ["-c:v","libx265","-pix_fmt","yuv420p","-tag:v","hvc1"]
+    elif "nvenc" in co:
+        cmd += ["-c:v",co,"-preset","p5"]
+    elif "vaapi" in co:
+        cmd += ["-c:v",co]   # frames are already NV12 in device memory
+    elif "qsv" in co:
+        cmd += ["-c:v",co]   # no -pix_fmt: QSV surfaces aren't yuv420p
     else:
         cmd += ["-c:v",co,"-pix_fmt","yuv420p"]
 
-    # Bitrate / CRF
+    # Bitrate / CRF — each HW encoder has its own quality knob
     if video_kbps:
         mr = int(video_kbps*1.3); bs = int(video_kbps*2.0)
         cmd += ["-b:v",f"{video_kbps}k","-maxrate",f"{mr}k","-bufsize",f"{bs}k"]
     elif preset.get("crf") is not None:
-        cmd += ["-crf",str(preset["crf"])]
+        crf = str(preset["crf"])
+        if "nvenc" in co:
+            cmd += ["-rc","vbr","-cq",crf]
+        elif "vaapi" in co:
+            cmd += ["-qp",crf]
+        elif "qsv" in co:
+            cmd += ["-global_quality",crf]
+        elif _is_hw_codec(co):
+            cmd += ["-q:v",crf]   # videotoolbox / amf
+        else:
+            cmd += ["-crf",crf]
 
     # Speed preset
     sp = preset.get("speed")
-    if sp and not any(h in co for h in HW): cmd += ["-preset",sp]
+    if sp and not _is_hw_codec(co): cmd += ["-preset",sp]
+
+    # Thread budget — explicit, because libx265 under-uses high-core-count
+    # boxes on its own. Parallel batches set _threads = cores//jobs so the
+    # whole batch stays at ≤100% CPU.
+    th = preset.get("_threads") or os.cpu_count() or 1
+    cmd += ["-threads", str(th)]
+    if co == "libx265":
+        cmd += ["-x265-params",
+                f"pools={th}:frame-threads={max(1, min(16, th//2))}"]
 
     # Two-pass
     if pass_num == 1:
-        cmd += ["-pass","1","-passlogfile",passlog,"-an","-f","mp4","/dev/null"]
+        # -sn/-dn alongside -an: pass 1 only wants video stats, so don't
+        # demux subtitle/data streams either
+        cmd += ["-pass","1","-passlogfile",passlog,"-an","-sn","-dn","-f","null","-"]
         return cmd
     elif pass_num == 2:
         cmd += ["-pass","2","-passlogfile",passlog]
 
     # Audio
     if not preset.get("_no_audio"):
-        ac = preset.get("audio_codec") or "aac"
-        ab = preset.get("audio_kbps")
-        if ac in ("copy","flac","pcm_s16le","pcm_s24le","pcm_s32le"):
-            cmd += ["-c:a", ac]
-            if "pcm" in ac: cmd += ["-ar","48000"]
-        else:
-            cmd += ["-c:a", ac]
-            if ab: cmd += ["-b:a", f"{ab}k"]
-            cmd += ["-ar","48000"]
+        cmd += _audio_args(preset.get("audio_codec") or "aac",
+                           preset.get("audio_kbps"))
 
     if out_ext == ".mp4": cmd += ["-movflags","+faststart"]
     cmd += [output_path]; return cmd
@@ -1696,7 +2297,42 @@ def build_cmd(input_path: str, output_path: str, preset: dict,
 # PROGRESS
 # ════════════════════════════════════════════════════════════════════════
 
+_QUIET = False   # set in batch worker processes — disables the live progress UI
+
+# Final total_size= reported by the most recent progressed encode — the
+# written byte count is already in the stream, so callers can skip a stat
+_LAST_SIZE = 0
+
+def _set_quiet() -> None:
+    global _QUIET, console
+    _QUIET = True
+    # Workers share the parent's terminal: encode_file banners, hw_fallback
+    # chatter and above all the CRF-search Live spinner would write ANSI
+    # sequences over the parent's result lines. Swap in a console that
+    # writes to /dev/null — the parent reports per-file outcomes itself.
+    console = Console(file=open(os.devnull, "w"))
+
 def run_with_progress(cmd: List[str], duration_s: float, label: str = "Encoding") -> bool:
+    if _QUIET:
+        # Worker process: several encodes run at once, so a live progress bar
+        # would interleave — just run ffmpeg silently.
+        try:
+            r = subprocess.run(cmd, stdout=_DEVNULL,
+                               stderr=_DEVNULL)
+        except FileNotFoundError:
+            return False
+        return r.returncode == 0
+    # Machine-readable progress: key=value records instead of regex-scraping
+    # the human status line. Sent to pipe:2 (stderr, which we read anyway) —
+    # pipe:1 would collide with pass-1's '-f null -' stdout sink. -loglevel
+    # error keeps info chatter (stream mapping, encoder banners) out of the
+    # pipe so almost every line the reader sees is a progress record.
+    cmd = cmd[:1] + ["-progress","pipe:2","-nostats","-loglevel","error"] + cmd[1:]
+    # Keys -progress emits that we don't display (bytes — the pipe is read raw)
+    skip_keys = {b"frame",b"fps",b"bitrate",b"out_time",
+                 b"dup_frames",b"drop_frames"}
+    global _LAST_SIZE
+    _LAST_SIZE = 0
     with Progress(
         SpinnerColumn(),
         TextColumn("[bold cyan]{task.description:<26}"),
@@ -1709,26 +2345,63 @@ def run_with_progress(cmd: List[str], duration_s: float, label: str = "Encoding"
         task = prog.add_task(label, total=100, eta="", speed="")
         try:
             proc = subprocess.Popen(cmd, stderr=subprocess.PIPE,
-                                    stdout=subprocess.DEVNULL, text=True)
+                                    stdout=_DEVNULL)
         except FileNotFoundError:
             console.print("[red]  ffmpeg not found![/]"); return False
 
-        stderr_lines: List[str] = []
-        for line in proc.stderr:
-            stderr_lines.append(line.rstrip())
-            if len(stderr_lines) > 30:          # keep last 30 lines
-                stderr_lines.pop(0)
-            t = parse_progress_time(line)
-            if t and duration_s > 0:
-                pct  = min(99.9, t/duration_s*100)
-                sm   = re.search(r"speed=\s*([\d.]+)x", line)
-                spd  = float(sm.group(1)) if sm else 0.0
-                sp_s = f"{spd:.1f}×" if spd>0 else ""
-                rem  = (duration_s-t)/spd if spd>0.01 else 0
-                eta  = f"ETA {human_dur(rem)}" if rem > 2 else ""
-                prog.update(task, completed=pct, speed=sp_s, eta=eta)
-
-        proc.wait()
+        stderr_lines: deque = deque(maxlen=30)   # ffmpeg log tail, O(1) append
+        cur = spd = 0.0
+        last_pct, last_spd, last_eta = -1.0, None, None   # diff the UI fields
+        try:
+            # Read the pipe as raw bytes: progress records are pure ASCII
+            # key=value and never need the io text layer — only genuine log
+            # lines (the rare case) get decoded for the error tail.
+            for line in proc.stderr:
+                line = line.strip()
+                key, sep, val = line.partition(b"=")
+                if sep:
+                    # Most record lines are keys we ignore — test that first
+                    if key in skip_keys or key.startswith(b"stream_"):
+                        continue
+                    if key in (b"out_time_us",b"out_time_ms"):  # both are µs
+                        try: cur = int(val)/1e6
+                        except ValueError: pass
+                        continue
+                    if key == b"total_size":
+                        try: _LAST_SIZE = int(val)
+                        except ValueError: pass
+                        continue
+                    if key == b"speed":
+                        try: spd = float(val.rstrip(b"x"))
+                        except ValueError: spd = 0.0
+                        continue
+                    if key == b"progress":
+                        # One UI update per record (~2 Hz at ffmpeg's default
+                        # stats period) — no extra throttle needed
+                        if duration_s > 0:
+                            pct  = min(99.9, cur/duration_s*100)
+                            sp_s = f"{spd:.1f}×" if spd>0 else ""
+                            rem  = (duration_s-cur)/spd if spd>0.01 else 0
+                            eta  = f"ETA {human_dur(rem)}" if rem > 2 else ""
+                            # Redraw only when something visible moved
+                            if (pct - last_pct >= 0.5 or sp_s != last_spd
+                                    or eta != last_eta):
+                                prog.update(task, completed=pct, speed=sp_s, eta=eta)
+                                last_pct, last_spd, last_eta = pct, sp_s, eta
+                        continue
+                # anything else is a real ffmpeg log line — keep the tail
+                if line:
+                    stderr_lines.append(line.decode("utf-8", "replace"))
+
+            proc.wait()
+        except KeyboardInterrupt:
+            # Abort just this encode, leave no orphaned ffmpeg behind
+            proc.terminate()
+            try: proc.wait(timeout=5)
+            except subprocess.TimeoutExpired: proc.kill()
+            prog.stop()
+            console.print("[yellow]  ✗  Encode cancelled.[/]")
+            raise
         if proc.returncode == 0:
             prog.update(task, completed=100, eta="", speed="done ✓")
             return True
@@ -1762,14 +2435,17 @@ def encode_file(input_path: str, output_path: str, preset: dict,
 
     # HW encoder fallback
     co = preset.get("codec") or "libx264"
-    HW = {"nvenc","vaapi","qsv","videotoolbox","amf"}
-    if any(h in co for h in HW):
-        preset = deepcopy(preset)
-        preset["codec"] = hw_fallback(co, input_path)
+    if _is_hw_codec(co):
+        preset = dict(preset)
+        preset["codec"] = hw_fallback(co)
+        # Per-file: the full-GPU pipeline is only safe when the decoder
+        # ASIC actually handles this source's codec
+        preset["_hw_decode"] = _hw_decodable((vs or {}).get("codec_name"),
+                                             (vs or {}).get("pix_fmt") or "")
 
     # Percent target
     if preset.get("_pct") and file_size_bytes(info) > 0 and duration > 0:
-        preset = deepcopy(preset)
+        preset = dict(preset)
         preset["target_mb"] = file_size_bytes(info)/1024/1024 * preset["_pct"]
         console.print(f"  [dim]Target: {preset['target_mb']:.1f} MB ({preset['_pct']*100:.0f}% of original)[/]")
 
@@ -1780,10 +2456,44 @@ def encode_file(input_path: str, output_path: str, preset: dict,
         ok = run_with_progress(cmd, duration, f"{label_p}Remuxing")
         return ok, output_path
 
+    # CRF search: probe samples for a CRF that fits the budget, then encode
+    # once instead of twice
+    if preset.get("target_mb") and preset.get("_crf_search") and duration > 0:
+        crf = find_crf_for_size(input_path, info, preset["target_mb"], preset)
+        if crf is not None:
+            console.print(f"  [dim]CRF search → [bold]CRF {crf}[/] single-pass "
+                          f"(est. under {preset['target_mb']:.0f} MB)[/]")
+            p2 = dict(preset)
+            p2["target_mb"] = None; p2["two_pass"] = False; p2["crf"] = crf
+            cmd = build_cmd(input_path, output_path, p2, src_w, src_h)
+            output_path = cmd[-1]
+            ok = run_with_progress(cmd, duration, f"{label_p}Encoding")
+            # The sample extrapolation under-estimates on short sources
+            # (the 80%-offset sample truncates at EOF), so the result can
+            # overshoot despite the safety margin — verify, and hand an
+            # over-budget file to the two-pass path below, which hits the
+            # target exactly and has its own retry.
+            if not ok or not os.path.exists(output_path):
+                return ok, output_path
+            actual_mb = os.path.getsize(output_path)/1024/1024
+            if actual_mb <= preset["target_mb"]:
+                return ok, output_path
+            console.print(
+                f"  [yellow]⚠  CRF {crf} result {actual_mb:.1f} MB exceeds "
+                f"{preset['target_mb']:.0f} MB target — re-encoding two-pass.[/]"
+            )
+        else:
+            console.print("  [yellow]CRF search failed — falling back to two-pass.[/]")
+
     # Two-pass
     if preset.get("target_mb") and duration > 0:
         akbps   = preset.get("audio_kbps") or 128
         vkbps   = target_video_kbps(preset["target_mb"], duration, akbps, BITRATE_SAFETY)
+        src_kbps = source_video_kbps(info)
+        if src_kbps and vkbps > src_kbps:
+            # Asking for more bits than the source has just inflates the file
+            console.print(f"  [dim]Capping target {vkbps} kb/s at source bitrate {src_kbps} kb/s[/]")
+            vkbps = src_kbps
         tmpdir  = tempfile.mkdtemp(prefix="fftoolbox_")
         passlog = os.path.join(tmpdir,"ff2pass")
         est_mb  = (vkbps+akbps)*1000*duration/(8*1024*1024)
@@ -1801,10 +2511,11 @@ def encode_file(input_path: str, output_path: str, preset: dict,
             cmd2 = build_cmd(input_path, output_path, preset, src_w, src_h, vkbps, 2, passlog)
             output_path = cmd2[-1]
             ok = run_with_progress(cmd2, duration, f"{label_p}Pass 2/2")
-        try: shutil.rmtree(tmpdir)
-        except: pass
 
-        # Post-encode verification — retry if over budget
+        # Post-encode verification — retry if over budget. The pass-1 log is
+        # a bitrate-independent complexity profile of this exact source, so
+        # the retry reuses it and goes straight to pass 2 at the lower rate —
+        # half the cost of redoing the analysis.
         if ok and os.path.exists(output_path):
             actual_mb = os.path.getsize(output_path)/1024/1024
             user_tgt  = preset["target_mb"]
@@ -1814,17 +2525,12 @@ def encode_file(input_path: str, output_path: str, preset: dict,
                     f"  [yellow]⚠  Output {actual_mb:.1f} MB — {over:.1f} MB over target. "
                     f"Auto-retrying at 90% margin …[/]"
                 )
-                vkbps2   = target_video_kbps(user_tgt, duration, akbps, 0.90)
-                tmpdir2  = tempfile.mkdtemp(prefix="fftoolbox_retry_")
-                passlog2 = os.path.join(tmpdir2,"ff2pass")
-                c1 = build_cmd(input_path, output_path, preset, src_w, src_h, vkbps2, 1, passlog2)
-                r1 = run_with_progress(c1, duration, f"{label_p}Retry 1/2")
-                if r1:
-                    c2 = build_cmd(input_path, output_path, preset, src_w, src_h, vkbps2, 2, passlog2)
-                    output_path = c2[-1]
-                    run_with_progress(c2, duration, f"{label_p}Retry 2/2")
-                try: shutil.rmtree(tmpdir2)
-                except: pass
+                vkbps2 = target_video_kbps(user_tgt, duration, akbps, 0.90)
+                c2 = build_cmd(input_path, output_path, preset, src_w, src_h, vkbps2, 2, passlog)
+                output_path = c2[-1]
+                run_with_progress(c2, duration, f"{label_p}Retry (pass 2)")
+        try: shutil.rmtree(tmpdir)
+        except OSError: pass
 
         return ok, output_path
 
@@ -1978,8 +2684,9 @@ def pick_output_mode(files: List[str], history: Optional[Dict] = None) -> Output
 # ════════════════════════════════════════════════════════════════════════
 
 def size_feedback(src_sz: int, dst_path: str, preset_key: str) -> None:
-    try: dst_sz = os.path.getsize(dst_path)
-    except: return
+    try: dst_sz = os.stat(dst_path).st_size   # one stat, no wrapper hop
+    except OSError: return
+    dst_mb = dst_sz / 1024 / 1024
     pct = (1 - dst_sz/src_sz)*100 if src_sz > 0 else 0
     clr = "green" if pct > 5 else ("yellow" if pct > -5 else "red")
     direction = "smaller" if pct > 0 else "LARGER"
@@ -1987,7 +2694,6 @@ def size_feedback(src_sz: int, dst_path: str, preset_key: str) -> None:
         f"  [green]✓[/]  {human_size(src_sz)} → [{clr}]{human_size(dst_sz)}[/]"
         f"  ({abs(pct):.1f}% {direction})"
     )
-    dst_mb = dst_sz / 1024 / 1024
     if preset_key == "whatsapp" and dst_mb > WHATSAPP_MB:
         console.print(
             f"\n  [bold yellow]⚠  {dst_mb:.1f} MB > WhatsApp {WHATSAPP_MB} MB limit.[/]\n"
@@ -2005,20 +2711,122 @@ def detect_cwd_media() -> Tuple[List[str], List[str], int]:
     Returns (video_files, audio_files, subdir_count) for current working directory.
     Only scans the top level — subdir count tells the user there is more below.
     """
-    cwd = Path.cwd()
-    vids = sorted(str(f) for f in cwd.iterdir()
-                  if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS)
-    auds = sorted(str(f) for f in cwd.iterdir()
-                  if f.is_file() and f.suffix.lower() in AUDIO_EXTENSIONS)
-    # Count subdirs that contain media (for the hint)
+    vids: List[str] = []; auds: List[str] = []; subdirs: List[str] = []
+    try:
+        with os.scandir(os.getcwd()) as it:
+            for e in it:                       # one pass, DirEntry-cached types
+                if e.is_dir(follow_symlinks=False):
+                    if not e.name.startswith("."):
+                        subdirs.append(e.path)
+                elif e.is_file():
+                    ext = _media_ext(e.name)
+                    if ext in VIDEO_EXTENSIONS:   vids.append(e.path)
+                    elif ext in AUDIO_EXTENSIONS: auds.append(e.path)
+    except OSError:
+        return [], [], 0
+    vids.sort(); auds.sort()
+    # iter_media_files is lazy, so "does this subdir contain media?" stops
+    # at the first hit instead of materializing the whole subtree
     subdirs_with_media = sum(
-        1 for d in cwd.iterdir()
-        if d.is_dir() and not d.name.startswith(".")
-        and any(True for f in d.rglob("*")
-                if f.is_file() and f.suffix.lower() in (VIDEO_EXTENSIONS | AUDIO_EXTENSIONS))
+        1 for d in subdirs
+        if next(iter_media_files(d, ALL_MEDIA), None) is not None
     )
     return vids, auds, subdirs_with_media
 
+# ════════════════════════════════════════════════════════════════════════
+# PARALLEL BATCH ENCODING
+# ════════════════════════════════════════════════════════════════════════
+
+def _encode_batch_worker(task: tuple) -> Tuple[str, bool, str]:
+    """Child-process entry point: encode one file without the live UI."""
+    fpath, out_path, preset, info, idx, total = task
+    ok, out_path = encode_file(fpath, out_path, preset, info, idx, total)
+    return fpath, ok, out_path
+
+def run_parallel_batch(files: List[str], infos: Dict[str, Optional[dict]],
+                       preset: dict, out_cfg: "OutputConfig", sfx: str,
+                       out_ext: str, jobs: int, selected_key: str
+                       ) -> Tuple[int, int, List[Tuple[str,str,int,int]]]:
+    """
+    Encode files concurrently in `jobs` worker processes.
+
+    Workers run ffmpeg silently (interleaved progress bars are unreadable);
+    the parent prints one result line per file as futures complete. Each
+    child gets `-threads cores//jobs` so the batch shares cores fairly.
+    """
+    cores = os.cpu_count() or 2
+    co = preset.get("codec") or "libx264"
+    if _is_hw_codec(co):
+        # Settle the HW verdict once in the parent — on a cold cache every
+        # worker would otherwise run the probe encode simultaneously. The
+        # disk cache this writes also covers the workers' own lookups.
+        preset = dict(preset)
+        preset["codec"] = hw_fallback(co)
+    tasks = []
+    for i, fpath in enumerate(files, 1):
+        fi = infos.get(fpath)     # plan-stage batch_probe already settled this
+        if not fi:
+            console.print(f"  [red]Cannot read: {escape(Path(fpath).name)} — skipping[/]")
+            continue
+        file_preset = dict(preset)
+        if preset.get("_pct") and file_size_bytes(fi) > 0 and file_duration(fi) > 0:
+            file_preset["target_mb"] = file_size_bytes(fi)/1024/1024 * preset["_pct"]
+        if already_under_target(file_preset, fi):
+            console.print(f"  [green]✓  {escape(Path(fpath).name)} — source bitrate already at/under target, skipping[/]")
+            continue
+        file_preset["_threads"] = max(1, cores // jobs)
+        # _claim_unique_path's O_EXCL open is the existence check — no
+        # separate stat per file before it
+        out_path = _claim_unique_path(out_cfg.output_path_for(fpath, sfx, out_ext))
+        tasks.append((fpath, out_path, file_preset, fi, i, len(files)))
+
+    success, failed, done = 0, 0, 0
+    results: List[Tuple[str,str,int,int]] = []
+    if not tasks:
+        return 0, 0, results
+    # Skips (unreadable, already under target) can leave fewer tasks than
+    # requested jobs — don't fork workers that would only sit idle
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                             initializer=_set_quiet) as ex:
+        futures = {ex.submit(_encode_batch_worker, t): t for t in tasks}
+        try:
+            for fut in as_completed(futures):
+                fpath, _, _, fi, _, _ = futures[fut]
+                done += 1
+                try:
+                    _, ok, out_path = fut.result()
+                except Exception as exc:
+                    console.print(f"  [red][{done}/{len(tasks)}]  ✗  {escape(Path(fpath).name)}: {exc}[/]")
+                    _unclaim_path(futures[fut][1])  # worker died before ffmpeg wrote anything
+                    failed += 1; continue
+                if ok and os.path.exists(out_path):
+                    src_sz = file_size_bytes(fi)
+                    dst_sz = os.path.getsize(out_path)
+                    console.print(f"\n  [bold][{done}/{len(tasks)}][/]  {escape(Path(fpath).name)}")
+                    size_feedback(src_sz, out_path, selected_key)
+                    console.print(f"  [dim]{escape(out_path)}[/]")
+                    success += 1; results.append((fpath, out_path, src_sz, dst_sz))
+                else:
+                    console.print(f"  [red][{done}/{len(tasks)}]  ✗  {escape(Path(fpath).name)}[/]")
+                    failed += 1
+        except KeyboardInterrupt:
+            # Don't let queued work start after Ctrl-C; the in-flight ffmpeg
+            # processes get the terminal's SIGINT and die on their own.
+            ex.shutdown(wait=False, cancel_futures=True)
+            # Cancelled tasks never overwrite their claimed placeholders —
+            # drop the empty files so a rerun can reuse the names
+            not_run = 0
+            for fut, task in futures.items():
+                if fut.cancelled():
+                    not_run += 1
+                    _unclaim_path(task[1])
+            console.print(
+                f"\n[yellow]  ✗  Batch cancelled — {success} done, "
+                f"{len(tasks)-success-not_run} aborted, {not_run} never started.[/]"
+            )
+            raise
+    return success, failed, results
+
 # ════════════════════════════════════════════════════════════════════════
 # MAIN
 # ════════════════════════════════════════════════════════════════════════
@@ -2078,6 +2886,9 @@ def main():
         )
 
     console.print()
+    # Second chance for the background update check — by now the directory
+    # scan has bought the network round-trip plenty of time
+    show_update_banner()
     mode_choices = ["1","2","3","4","u"]
     if cwd_media or cwd_subdirs: mode_choices.append("c")
     mode = Prompt.ask("Mode", choices=mode_choices, default="1")
@@ -2115,17 +2926,7 @@ def main():
         else:
             go_recursive = False
 
-        if go_recursive:
-            files_override = sorted(
-                str(f) for f in cwd.rglob("*")
-                if f.is_file() and f.suffix.lower() in ext
-                and "_originals" not in f.parts   # skip backup folders
-            )
-        else:
-            files_override = sorted(
-                str(f) for f in cwd.iterdir()
-                if f.is_file() and f.suffix.lower() in ext
-            )
+        files_override = sorted(iter_media_files(cwd, ext, recursive=go_recursive))
     else:
         files_override = None
 
@@ -2186,8 +2987,7 @@ def main():
             if p.is_file():
                 files = [str(p)]
             elif p.is_dir():
-                files = sorted(str(f) for f in p.iterdir()
-                               if f.is_file() and f.suffix.lower() in ext)
+                files = sorted(iter_media_files(p, ext, recursive=False))
             else:
                 console.print(f"[red]  Not found: {raw}[/]"); return
         elif sel == "3":
@@ -2196,17 +2996,19 @@ def main():
             if not p.is_dir(): console.print("[red]  Not a directory.[/]"); return
             recursive = Confirm.ask("  Include subdirectories?", default=False)
             ext = ALL_MEDIA if audio_only_mode else (VIDEO_EXTENSIONS | AUDIO_EXTENSIONS)
-            g   = p.rglob("*") if recursive else p.iterdir()
-            files = sorted(str(f) for f in g if f.is_file() and f.suffix.lower() in ext)
+            files = sorted(iter_media_files(p, ext, recursive=recursive))
         elif sel == "4" and history.get("recent_dirs"):
             d = history["recent_dirs"][0]
             ext = ALL_MEDIA if audio_only_mode else (VIDEO_EXTENSIONS | AUDIO_EXTENSIONS)
-            files = sorted(str(f) for f in Path(d).iterdir()
-                          if f.is_file() and f.suffix.lower() in ext)
+            files = sorted(iter_media_files(d, ext, recursive=False))
             console.print(f"  [dim]{len(files)} file(s) from {escape(d)}[/]")
 
     if not files: console.print("[red]  No files found.[/]"); return
-    files = sorted(set(files))
+    # Every Step-1 branch already yields sorted paths, so de-dup just needs
+    # to preserve that order — dict.fromkeys is O(N) vs. re-sorting the set
+    files = list(dict.fromkeys(files))
+    if len(files) > 1:
+        files = dedup_files(files)
     console.print(f"\n  [green]✓[/]  [bold]{len(files)} file(s) selected[/]")
     for f in files[:4]: console.print(f"  [dim]{escape(f)}[/]")
     if len(files)>4: console.print(f"  [dim]… +{len(files)-4} more[/]")
@@ -2275,7 +3077,7 @@ def main():
     if mode == "4":
         console.print()
         console.print(Rule("[bold]🔧  DaVinci Resolve Linux Audio Fix[/]"))
-        preset      = deepcopy(PRESETS["resolve_audio_fix"])
+        preset      = dict(PRESETS["resolve_audio_fix"])
         preset      = configure_preset("resolve_audio_fix", preset, first_info)
         selected_key = "resolve_audio_fix"
 
@@ -2284,8 +3086,9 @@ def main():
             console.print("[yellow]  Cancelled.[/]"); return
 
         success, failed = 0, 0
+        batch_probe(files, infos)
         for i, fpath in enumerate(files, 1):
-            fi = infos.get(fpath) or run_ffprobe(fpath); infos[fpath] = fi
+            fi = infos.get(fpath)     # batch_probe above already settled this
             if not fi:
                 console.print(f"  [{i}] [red]Cannot read: {escape(Path(fpath).name)}[/]")
                 failed += 1; continue
@@ -2332,6 +3135,13 @@ def main():
     # ════════════════════════════════════════════════════════════════════
     # VIDEO CONVERSION (mode 1) — preset selection
     # ════════════════════════════════════════════════════════════════════
+    # Probe the rest of the batch while the user picks a preset — the
+    # prompts below are pure think-time, so by plan time this has landed
+    # and the Encode Plan table renders without a probing pause.
+    prefetch = None
+    if len(files) > 1:
+        prefetch = ThreadPoolExecutor(max_workers=1)
+        prefetch_fut = prefetch.submit(batch_probe, files, infos, True)
     console.print()
     console.print(Rule("[bold]Step 2 · Choose Preset[/]"))
     console.print()
@@ -2349,7 +3159,7 @@ def main():
         selected_key = "_imported"; preset = imported
     elif raw_c.isdigit() and 1 <= int(raw_c) <= len(preset_keys):
         selected_key = preset_keys[int(raw_c)-1]
-        preset       = deepcopy(PRESETS[selected_key])
+        preset       = dict(PRESETS[selected_key])
         tip = preset.get("tip","")
         if tip: console.print(f"\n  [dim]💡 {tip}[/]")
         preset = configure_preset(selected_key, preset, first_info)
@@ -2369,6 +3179,10 @@ def main():
     # ── Encode plan ──────────────────────────────────────────────────────
     console.print()
     console.print(Rule("[bold]Encode Plan[/]"))
+    if prefetch is not None:
+        prefetch_fut.result()
+        prefetch.shutdown()
+    batch_probe(files, infos)   # no-op when the prefetch covered everything
     sfx     = (selected_key if selected_key not in ("_imported","custom") else "custom")
     out_ext = preset.get("_output_ext",".mp4")
 
@@ -2380,26 +3194,59 @@ def main():
     plan_tbl.add_column("→ Output", max_width=30, overflow="fold")
     total_src = 0
 
+    inplace = out_cfg.mode in ("inplace","inplace_backup")
+    rows: List[Tuple[str,str,str,str,str]] = []
     for f in files:
-        fi = infos.get(f) or run_ffprobe(f); infos[f] = fi
-        out_preview = out_cfg.output_path_for(f, sfx, out_ext)
-        out_label   = (
-            f"[dim](in-place)[/]"
-            if out_cfg.mode in ("inplace","inplace_backup")
-            else escape(Path(out_preview).name)
+        # batch_probe above guarantees an entry per file; a None here means the
+        # probe genuinely failed, so don't stack serial re-probes on top of it
+        fi   = infos.get(f)
+        base = os.path.basename(f)
+        out_label = (
+            "[dim](in-place)[/]" if inplace
+            else escape(os.path.basename(out_cfg.output_path_for(f, sfx, out_ext)))
         )
         if fi:
             sz  = file_size_bytes(fi); dur = file_duration(fi)
             vs  = video_stream(fi)
             w   = (vs or {}).get("width","?"); h = (vs or {}).get("height","?")
             total_src += sz
-            plan_tbl.add_row(Path(f).name, human_size(sz), human_dur(dur), f"{w}×{h}", out_label)
+            rows.append((base, human_size(sz), human_dur(dur), f"{w}×{h}", out_label))
         else:
-            plan_tbl.add_row(Path(f).name,"?","?","?",out_label)
+            rows.append((base,"?","?","?",out_label))
+
+    # Rich pays per cell at render time, and a thousand-row plan is noise
+    # anyway — show the first chunk and summarize the rest (same precedent
+    # as the 4-file preview in the file list).
+    shown = 100
+    for row in rows[:shown]:
+        plan_tbl.add_row(*row)
+    if len(rows) > shown:
+        plan_tbl.add_row(f"[dim]… and {len(rows)-shown} more[/]","","","","")
 
     console.print(plan_tbl)
     if total_src > 0:
         console.print(f"  [dim]Total input: {human_size(total_src)}[/]")
+
+    # One statvfs up front beats discovering a full disk three hours into
+    # the batch. Estimate output size from the preset where possible,
+    # falling back to the (pessimistic) input total.
+    est = total_src
+    if preset.get("_pct"):
+        est = int(total_src * preset["_pct"])
+    elif preset.get("target_mb"):
+        est = int(preset["target_mb"] * 1024 * 1024) * len(files)
+    space_dir = out_cfg.base_dir or os.path.dirname(files[0])
+    try:
+        free = shutil.disk_usage(space_dir).free
+    except OSError:
+        free = 0   # exotic mount — don't block the run on a failed statvfs
+    if free and est > 0 and free < 1.2 * est:
+        console.print(
+            f"  [bold yellow]⚠  Low disk space: {human_size(free)} free at "
+            f"{escape(space_dir)}, batch may need ~{human_size(est)}.[/]"
+        )
+        if not Confirm.ask("  Continue anyway?", default=False):
+            console.print("[yellow]  Cancelled.[/]"); return
     if out_cfg.mode == "inplace_backup":
         console.print(
             f"  [bold yellow]⚠  Originals will be moved to "
@@ -2408,6 +3255,22 @@ def main():
     elif out_cfg.mode == "inplace":
         console.print("  [bold red]⚠  Originals will be overwritten with no backup![/]")
 
+    # Parallel encoding (only for normal output mode — in-place stays serial)
+    jobs = 1
+    if len(files) > 1 and out_cfg.mode == "subfolder":
+        cores   = os.cpu_count() or 2
+        default = max(1, cores // 2)
+        env = safe_int(os.environ.get("FFTOOLBOX_CONCURRENCY"))
+        if env > 0:
+            # scripted/batch use — take the env value without prompting
+            jobs = min(env, len(files))
+        else:
+            console.print(f"\n  [dim]{len(files)} files · {cores} cores — parallel encodes finish batches much faster,[/]")
+            console.print("  [dim]but run without individual progress bars.[/]")
+            jobs = safe_int(Prompt.ask("  Parallel encodes (1 = serial)",
+                                       default=str(default)), default)
+            jobs = max(1, min(jobs, len(files)))
+
     console.print()
     if not Confirm.ask("[bold]Start encoding?[/]", default=True):
         console.print("[yellow]  Cancelled.[/]"); return
@@ -2418,7 +3281,15 @@ def main():
     success, failed = 0, 0
     results: List[Tuple[str,str,int,int]] = []
 
-    for i, fpath in enumerate(files, 1):
+    if jobs > 1:
+        s, f, results = run_parallel_batch(files, infos, preset, out_cfg,
+                                           sfx, out_ext, jobs, selected_key)
+        success += s; failed += f
+        serial_files: List[str] = []
+    else:
+        serial_files = files
+
+    for i, fpath in enumerate(serial_files, 1):
         console.print()
         # Show relative path when we have a batch root
         if out_cfg.batch_root:
@@ -2430,15 +3301,19 @@ def main():
             display_name = Path(fpath).name
         console.print(f"  [bold][{i}/{len(files)}][/]  {escape(display_name)}")
 
-        fi = infos.get(fpath) or run_ffprobe(fpath)
+        fi = infos.get(fpath)     # settled at plan time; None means probe failed
         if not fi:
             console.print("  [red]  Cannot read file — skipping[/]"); failed += 1; continue
 
         # Per-file percent target
-        file_preset = deepcopy(preset)
+        file_preset = dict(preset)
         if preset.get("_pct") and file_size_bytes(fi) > 0 and file_duration(fi) > 0:
             file_preset["target_mb"] = file_size_bytes(fi)/1024/1024 * preset["_pct"]
 
+        if already_under_target(file_preset, fi):
+            console.print("  [green]✓  Source bitrate already at/under target — skipping (no size win).[/]")
+            continue
+
         src_sz = file_size_bytes(fi)
 
         # For in-place modes: backup original first, then encode to original path
@@ -2470,6 +3345,7 @@ def main():
         except Exception as exc:
             console.print(f"  [red]  Error: {exc}[/]")
             if os.environ.get("FFTOOLBOX_DEBUG"):
+                import traceback
                 console.print(f"  [dim]{traceback.format_exc()}[/]")
             ok = False; out_path = out_path or ""
 
@@ -2484,7 +3360,9 @@ def main():
                 ok = False
 
         if ok and os.path.exists(out_path):
-            dst_sz = os.path.getsize(out_path)
+            # the progress stream's final total_size= already says how many
+            # bytes landed — only stat if the encode ran silently
+            dst_sz = _LAST_SIZE or os.path.getsize(out_path)
             size_feedback(src_sz, out_path, selected_key)
             console.print(f"  [dim]{escape(out_path)}[/]")
             success += 1; results.append((fpath, out_path, src_sz, dst_sz))